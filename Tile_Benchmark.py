@@ -0,0 +1,189 @@
+# benchmarks for generate / re-gen / clear at increasing grid sizes
+# runs headless: the generator talks to a recording stand-in for maya.cmds that counts every call
+#
+#   python Tile_Benchmark.py --output results.json
+#   python Tile_Benchmark.py --max-tiles 100000 --compare results.json
+#
+# separate cubes and instances still cost commands per tile, an undoable pass can't go through a modifier:
+# generate 2 per tile (polyCube / instance + xform), re-gen 2 per cube (polyCube edit + xform) and 1 per instance
+import argparse
+import contextlib
+import io
+import json
+import platform
+import sys
+import time
+import tracemalloc
+import types
+
+import numpy as np
+
+import Tile_Commit as tc
+import Tile_Layout as tl
+
+FORMAT_VERSION = 1
+
+GRID_SIZES = ((10, 5), (50, 50), (100, 100), (250, 250), (500, 500), (1000, 1000))
+MODES = ("cubes", "instanced", "merged")
+CALL_COST = 20e-6  # simulated seconds per maya.cmds call
+
+
+def loadGenerator():
+    # Tile_Generator imports maya.cmds, so a recording stand-in has to be in place before the import
+    if "maya.cmds" not in sys.modules:
+        maya = types.ModuleType("maya")
+        maya.cmds = tc.RecordingCmds(keepHistory=False)
+        sys.modules["maya"] = maya
+        sys.modules["maya.cmds"] = maya.cmds
+    import Tile_Generator
+    return Tile_Generator
+
+
+def measure(cmds, tileCount, function, profiler=None):
+    calls = cmds.callCounts.copy()
+    simulated = cmds.simulatedTime
+
+    with contextlib.redirect_stdout(io.StringIO()):  # the generator prints progress
+        start = time.perf_counter()
+        function()
+        seconds = time.perf_counter() - start
+
+    calls = cmds.callCounts - calls
+    result = {"seconds": seconds,
+              "secondsPerTile": seconds / tileCount,
+              "callCount": sum(calls.values()),
+              "calls": dict(calls),
+              "simulatedCommandSeconds": cmds.simulatedTime - simulated}
+    if profiler is not None and profiler.last is not None:
+        result["phases"] = profiler.last.asDict()["phases"]
+    return result
+
+
+def createGenerator(module, mode, tileX, tileY, callCost, processes=1):
+    cmds = tc.RecordingCmds(keepHistory=False, callCost=callCost)
+    generator = module.TileGenerator()
+    generator.backend = tc.RecordingBackend(cmds)
+    generator.outputMode = mode
+    generator.layoutProcesses = processes
+    generator.profiler.enabled = True  # phase timings end up in the results, the command counts come from cmds
+    generator.tileX = tileX
+    generator.tileY = tileY
+    return generator, cmds
+
+
+def runCase(module, mode, tileX, tileY, callCost=CALL_COST, memory=True, processes=1):
+    tileCount = tileX * tileY
+    generator, cmds = createGenerator(module, mode, tileX, tileY, callCost, processes)
+
+    start = time.perf_counter()
+    if processes == 1:
+        tl.computeLayout(generator.layoutParams())
+    else:
+        tl.computeLayoutParallel(generator.layoutParams(), processes or None)
+    sampling = time.perf_counter() - start
+
+    result = {"mode": mode, "tileX": tileX, "tileY": tileY, "tiles": tileCount,
+              "samplingSeconds": sampling, "samplingSecondsPerTile": sampling / tileCount}
+
+    result["generate"] = measure(cmds, tileCount, generator.buildTiles, generator.profiler)
+
+    # re-generate every tile, for instanced tiles the hidden source is left out
+    cmds.selection = [tile[0] for tile in generator.generatedTiles
+                      if tile[0] in generator.registry or tile[0] in generator.mergedLayouts]
+    result["reGenerate"] = measure(cmds, tileCount, generator.reGenerateSelection, generator.profiler)
+
+    result["clear"] = measure(cmds, tileCount, generator.clearTiles, generator.profiler)
+
+    if memory:
+        # separate run, tracemalloc slows everything down and would skew the timings above
+        generator, cmds = createGenerator(module, mode, tileX, tileY, callCost, processes)
+        tracemalloc.start()
+        generator.buildTiles()
+        result["peakMemoryBytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return result
+
+
+def runSuite(sizes=GRID_SIZES, modes=MODES, callCost=CALL_COST, memory=True, maxTiles=None, log=None, processes=1):
+    module = loadGenerator()
+    results = []
+    for tileX, tileY in sizes:
+        if maxTiles is not None and tileX * tileY > maxTiles:
+            continue
+        for mode in modes:
+            result = runCase(module, mode, tileX, tileY, callCost, memory, processes)
+            results.append(result)
+            if log is not None:
+                log(formatResult(result))
+
+    return {"version": FORMAT_VERSION,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "callCost": callCost,
+            "processes": processes,
+            "results": results}
+
+
+def formatResult(result):
+    line = "{mode:>9} {tileX:>5}x{tileY:<5} sampling {sampling:8.4f}s".format(
+        mode=result["mode"], tileX=result["tileX"], tileY=result["tileY"], sampling=result["samplingSeconds"])
+    for phase in ("generate", "reGenerate", "clear"):
+        line += " | {phase} {seconds:8.3f}s {perTile:7.2f}us/tile {calls:>8} calls".format(
+            phase=phase, seconds=result[phase]["seconds"], perTile=result[phase]["secondsPerTile"] * 1e6,
+            calls=result[phase]["callCount"])
+    if "peakMemoryBytes" in result:
+        line += " | peak {memory:.1f}MB".format(memory=result["peakMemoryBytes"] / 1e6)
+    return line
+
+
+def compare(baseline, current):
+    # ratio current / baseline per phase, above 1 means slower than the baseline
+    previous = {(result["mode"], result["tileX"], result["tileY"]): result for result in baseline["results"]}
+    lines = []
+    for result in current["results"]:
+        old = previous.get((result["mode"], result["tileX"], result["tileY"]))
+        if old is None:
+            continue
+        ratios = ["{phase} x{ratio:.2f}".format(phase=phase, ratio=result[phase]["seconds"] / old[phase]["seconds"])
+                  for phase in ("generate", "reGenerate", "clear") if old[phase]["seconds"] > 0]
+        lines.append("{mode:>9} {tileX:>5}x{tileY:<5} ".format(**result) + "  ".join(ratios))
+    return lines
+
+
+def parseSize(text):
+    tileX, _, tileY = text.lower().partition("x")
+    return int(tileX), int(tileY or tileX)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Tile Generator without Maya")
+    parser.add_argument("--sizes", nargs="+", type=parseSize, default=GRID_SIZES,
+                        help="grid sizes like 10x5 100x100 (default: 10x5 up to 1000x1000)")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    parser.add_argument("--max-tiles", type=int, help="skip grids with more tiles than this")
+    parser.add_argument("--call-cost", type=float, default=CALL_COST,
+                        help="simulated seconds per maya.cmds call (default: %(default)s)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the peak memory measurement")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="processes computing the layout, 0 uses every core (default: %(default)s)")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    args = parser.parse_args(argv)
+
+    report = runSuite(args.sizes, args.modes, args.call_cost, not args.no_memory, args.max_tiles, log=print,
+                      processes=args.processes)
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+    if args.compare:
+        with open(args.compare) as baseline:
+            for line in compare(json.load(baseline), report):
+                print(line)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# memoization of computed layouts, usable without Maya
+# switching back to a parameter set (and seed) that was generated before gives its layout without
+# sampling (or resolving overlaps) again, the least recently used layouts go when the memory budget is full
+import collections
+
+TILE_BYTES = 9 * 8  # sizes, positions and rotations of a tile, float64
+
+
+def layoutKey(params, resolved=False, rows=None):
+    # every value that decides the layout, normalised so an int field and a float field with the same value match,
+    # rows is set for layouts of only the first rows of the grid (e.g. the preview of a big grid)
+    # the keep flags and the output mode don't change the layout, so they are not part of the key
+    values = tuple(int(value) if name in ("tileX", "tileY", "seed") else float(value)
+                   for name, value in zip(params.FIELDS, params.values()))
+    if rows is not None and rows >= int(params.tileX):
+        rows = None
+    return values, bool(resolved), rows
+
+
+def layoutBytes(layout):
+    size = layout.sizes.nbytes + layout.positions.nbytes + layout.rotations.nbytes
+    if layout.indices is not None:
+        size += layout.indices.nbytes
+    return size
+
+
+class LayoutCache:
+    def __init__(self, budget=256 * 1024 ** 2):
+        self.budget = budget  # bytes, 0 switches the cache off
+        self.entries = collections.OrderedDict()  # key -> (layout, report), least recently used first
+        self.size = 0  # bytes in use
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def fits(self, tileCount):
+        # true when the layout of tileCount tiles can be cached at all
+        return 0 < tileCount * TILE_BYTES <= self.budget
+
+    def get(self, key, copy=True):
+        # (copy of the layout, overlap report or None), or None on a miss
+        # the layout is copied, Re-Gen and updates change layouts in place,
+        # without copy the cached layout itself is returned and must only be read
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return (entry[0].copy() if copy else entry[0]), entry[1]
+
+    def put(self, key, layout, report=None, copy=True):
+        # stores a copy of the layout (or the layout itself, when nothing else changes it),
+        # layouts bigger than the whole budget are not stored
+        size = layoutBytes(layout)
+        if size > self.budget:
+            return
+        self.discard(key)
+        self.entries[key] = (layout.copy() if copy else layout, report)
+        self.size += size
+        while self.size > self.budget:
+            self.evict()
+
+    def evict(self):
+        key, (layout, report) = self.entries.popitem(last=False)
+        self.size -= layoutBytes(layout)
+        self.evictions += 1
+
+    def discard(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= layoutBytes(entry[0])
+
+    def resize(self, budget):
+        # a smaller budget evicts right away
+        self.budget = budget
+        while self.size > self.budget:
+            self.evict()
+
+    def clear(self):
+        self.entries.clear()
+        self.size = 0
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "layouts": len(self),
+                "bytes": self.size, "budget": self.budget}
+
+    def __str__(self):
+        return "layout cache: {hits} hits, {misses} misses, {evictions} evicted, {layouts} layouts in " \
+               "{used:.1f} / {budget:.0f} MB".format(hits=self.hits, misses=self.misses, evictions=self.evictions,
+                                                     layouts=len(self), used=self.size / 1024 ** 2,
+                                                     budget=self.budget / 1024 ** 2)
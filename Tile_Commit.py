@@ -0,0 +1,508 @@
+# batched scene edits for the Tile Generator
+# a SceneBatch collects everything one generate / re-gen pass changes in the scene,
+# a backend applies the whole batch at once as a single undo chunk
+import collections
+import re
+
+import numpy as np
+
+
+class Operation:
+    # one queued scene edit, result holds the created nodes after the batch was committed
+    def __init__(self, kind, **data):
+        self.kind = kind
+        self.data = data
+        self.result = []
+
+    def nodes(self):
+        # transforms created by this operation
+        return [created[0] for created in self.result]
+
+
+class SceneBatch:
+    def __init__(self, name="tileGenerator"):
+        self.name = name  # name of the undo chunk
+        self.operations = []
+
+    def __len__(self):
+        return len(self.operations)
+
+    def add(self, kind, **data):
+        operation = Operation(kind, **data)
+        self.operations.append(operation)
+        return operation
+
+    def createCubes(self, sizes, name="pCube#"):
+        # one polyCube per row of (width, height, depth)
+        return self.add("cubes", sizes=np.asarray(sizes, dtype=float).reshape(-1, 3), name=name)
+
+    def createInstances(self, source, count):
+        return self.add("instances", source=source, count=count)
+
+    def createMesh(self, buffers, name="tileMesh#"):
+        return self.add("mesh", buffers=buffers, name=name)
+
+    def setTransforms(self, nodes, positions, rotations, scales=None):
+        return self.add("transforms", nodes=nodes, positions=positions, rotations=rotations, scales=scales)
+
+    def setTransformAttrs(self, nodes, values):
+        # values: translate / rotate / scale component (e.g. "translateY") -> one value per node,
+        # written with one xform per node, components that are not given keep their value
+        return self.add("transformAttrs", nodes=nodes, values=values)
+
+    def setCubeSizes(self, nodes, values):
+        # values: "width" / "height" / "depth" -> one value per polyCube node, one edit per node
+        return self.add("cubeSizes", nodes=nodes, values=values)
+
+    def setAttrs(self, nodes, attr, values):
+        # one value per node, values can also be a single value for all nodes
+        return self.add("attrs", nodes=nodes, attr=attr, values=values)
+
+    def setPoints(self, mesh, indices, points):
+        return self.add("points", mesh=mesh, indices=indices, points=points)
+
+    def createGroup(self, name, dataAttributes=()):
+        # empty group with extra attributes, given as (attribute, data type)
+        return self.add("group", name=name, dataAttributes=tuple(dataAttributes))
+
+    def parent(self, nodes, group):
+        # nodes can mix names and earlier operations
+        return self.add("parent", nodes=nodes, group=group)
+
+    def setData(self, node, attr, value, dataType):
+        # a single typed value (string, Int32Array, ...) on one node
+        return self.add("data", node=node, attr=attr, value=value, dataType=dataType)
+
+    def delete(self, nodes):
+        return self.add("delete", nodes=nodes)
+
+
+def resolveNodes(nodes):
+    # nodes can be names or an earlier operation of the same batch
+    if isinstance(nodes, Operation):
+        return nodes.nodes()
+    if isinstance(nodes, str):
+        return [nodes]
+    return list(nodes)
+
+
+class MayaBackend:
+    # applies batches through maya.cmds (or anything that behaves like it)
+    def __init__(self, cmds=None):
+        if cmds is None:
+            import maya.cmds as cmds
+        self.cmds = cmds
+        self.profiler = None  # set during a profiled run, every kind of operation is timed as a phase
+
+    def commit(self, batch):
+        if not batch.operations:
+            return batch
+
+        self.cmds.undoInfo(openChunk=True, chunkName=batch.name)
+        try:
+            for operation in batch.operations:
+                apply = getattr(self, "apply_" + operation.kind)
+                if self.profiler is None:
+                    apply(operation, **operation.data)
+                else:
+                    with self.profiler.phase("scene." + operation.kind):
+                        apply(operation, **operation.data)
+        finally:
+            self.cmds.undoInfo(closeChunk=True)
+        return batch
+
+    def apply_cubes(self, operation, sizes, name):
+        for width, height, depth in sizes.tolist():
+            operation.result.append(self.cmds.polyCube(w=width, h=height, d=depth, name=name))
+
+    def apply_instances(self, operation, source, count):
+        source = resolveNodes(source)[0]
+        for n in range(count):
+            operation.result.append(self.cmds.instance(source))
+
+    def apply_transforms(self, operation, nodes, positions, rotations, scales):
+        # one xform per node instead of a separate move and rotate
+        nodes = resolveNodes(nodes)
+        positions = np.asarray(positions).tolist()
+        rotations = np.asarray(rotations).tolist()
+        if scales is None:
+            for n in range(len(nodes)):
+                self.cmds.xform(nodes[n], translation=positions[n], rotation=rotations[n])
+        else:
+            scales = np.asarray(scales).tolist()
+            for n in range(len(nodes)):
+                self.cmds.xform(nodes[n], translation=positions[n], rotation=rotations[n], scale=scales[n])
+
+    def apply_transformAttrs(self, operation, nodes, values):
+        nodes = resolveNodes(nodes)
+        flags = {}
+        for vector, flag in (("translate", "translation"), ("rotate", "rotation"), ("scale", "scale")):
+            given = [axis for axis in range(3) if vector + "XYZ"[axis] in values]
+            if not given:
+                continue
+            # xform takes whole vectors, the components that are not given are read without a command
+            vectors = self.transformValues(nodes, vector) if len(given) < 3 else np.empty((len(nodes), 3))
+            for axis in given:
+                vectors[:, axis] = values[vector + "XYZ"[axis]]
+            flags[flag] = vectors.tolist()
+        for n in range(len(nodes)):
+            self.cmds.xform(nodes[n], **{flag: rows[n] for flag, rows in flags.items()})
+
+    def transformValues(self, nodes, vector):
+        # (n, 3) current translate / rotate (degrees) / scale of the nodes, read through the API
+        import maya.api.OpenMaya as om
+
+        selection = om.MSelectionList()
+        for node in nodes:
+            selection.add(node)
+        values = np.empty((len(nodes), 3))
+        for n in range(len(nodes)):
+            transform = om.MFnTransform(selection.getDagPath(n))
+            if vector == "translate":
+                value = transform.translation(om.MSpace.kTransform)
+            elif vector == "rotate":
+                rotation = transform.rotation()
+                value = np.degrees((rotation.x, rotation.y, rotation.z))
+            else:
+                value = transform.scale()
+            values[n] = (value[0], value[1], value[2])
+        return values
+
+    def apply_cubeSizes(self, operation, nodes, values):
+        nodes = resolveNodes(nodes)
+        values = {attr: np.broadcast_to(np.asarray(value, dtype=float), (len(nodes),)).tolist()
+                  for attr, value in values.items()}
+        for n in range(len(nodes)):
+            self.cmds.polyCube(nodes[n], edit=True, **{attr: value[n] for attr, value in values.items()})
+
+    def apply_attrs(self, operation, nodes, attr, values):
+        nodes = resolveNodes(nodes)
+        if np.ndim(values) == 0:
+            values = [values] * len(nodes)
+        else:
+            values = np.asarray(values).tolist()
+        for node, value in zip(nodes, values):
+            self.cmds.setAttr("{node}.{attr}".format(node=node, attr=attr), value)
+
+    def apply_group(self, operation, name, dataAttributes):
+        group = self.cmds.group(empty=True, name=name)
+        for attr, dataType in dataAttributes:
+            self.cmds.addAttr(group, longName=attr, dataType=dataType)
+        operation.result.append([group])
+
+    def apply_parent(self, operation, nodes, group):
+        nodes = [node for item in nodes for node in resolveNodes(item)]
+        if nodes:
+            self.cmds.parent(nodes, resolveNodes(group)[0])
+
+    def apply_data(self, operation, node, attr, value, dataType):
+        plug = "{node}.{attr}".format(node=resolveNodes(node)[0], attr=attr)
+        self.cmds.setAttr(plug, value, type=dataType)
+
+    def apply_delete(self, operation, nodes):
+        # a single delete for everything that still exists
+        nodes = resolveNodes(nodes)
+        if not nodes:
+            return  # ls without names would list the whole scene
+        existing = self.cmds.ls(nodes)
+        if existing:
+            self.cmds.delete(existing)
+
+    def apply_mesh(self, operation, buffers, name):
+        # the API builds the whole mesh in one call, only the naming and shading go through cmds
+        # API edits are not part of the undo queue, undoing leaves the mesh (see README)
+        import maya.api.OpenMaya as om
+
+        points = om.MPointArray([om.MPoint(point) for point in buffers.points.tolist()])
+        meshObject = om.MFnMesh().create(points, buffers.faceCounts.tolist(), buffers.faceConnects.tolist())
+        transform = self.cmds.rename(om.MFnDagNode(meshObject).name(), name)
+        shape = self.cmds.listRelatives(transform, shapes=True, fullPath=True)[0]
+        self.cmds.sets(shape, edit=True, forceElement="initialShadingGroup")
+        operation.result.append([transform, shape])
+
+    def apply_points(self, operation, mesh, indices, points):
+        # one setPoints call for the whole mesh, a setPoint call per point is far too slow for big meshes
+        import maya.api.OpenMaya as om
+
+        selection = om.MSelectionList()
+        selection.add(resolveNodes(mesh)[0])
+        meshFn = om.MFnMesh(selection.getDagPath(0))
+        indices = np.asarray(indices)
+        if len(indices) == meshFn.numVertices:
+            # every point is rewritten (preview, updates), the current points are not read at all
+            ordered = np.empty((len(indices), 3))
+            ordered[indices] = points
+            pointArray = om.MPointArray([om.MPoint(point) for point in ordered.tolist()])
+        else:
+            pointArray = meshFn.getPoints(om.MSpace.kObject)
+            for index, point in zip(indices.tolist(), np.asarray(points).tolist()):
+                pointArray[index] = om.MPoint(point)
+        meshFn.setPoints(pointArray, om.MSpace.kObject)
+
+
+class RecordingCmds:
+    # in-memory stand-in for the parts of maya.cmds the generator uses
+    # every call is counted, so tests and benchmarks can run without Maya
+    def __init__(self, keepHistory=True, callCost=0.0, commandCosts=None):
+        self.keepHistory = keepHistory
+        self.history = []  # (command, args, flags)
+        self.callCounts = collections.Counter()
+        # simulated seconds per call, added up instead of slept so timings of the Python side stay clean
+        self.callCost = callCost
+        self.commandCosts = commandCosts or {}
+        self.simulatedTime = 0.0
+        self.nodes = {}  # name -> attribute values
+        self.shapes = {}  # transform -> shape
+        self.shapeUsers = collections.Counter()  # shape -> number of transforms (instances) using it
+        self.connections = {}  # shape -> connected nodes
+        self.nodeTypes = {}  # name -> node type, only for nodes other than transforms and shapes
+        self.children = {}  # group -> child transforms (a dict used as ordered set)
+        self.parents = {}  # child transform -> group
+        self.selection = []
+        self.undoChunks = 0
+        self.openChunks = 0
+        self.nameCounters = collections.Counter()
+
+    def __getattr__(self, command):
+        # every command that is not simulated (UI calls etc.) is only recorded
+        if command.startswith("__"):
+            raise AttributeError(command)
+
+        def call(*args, **flags):
+            self.record(command, args, flags)
+        return call
+
+    def record(self, command, args, flags):
+        self.callCounts[command] += 1
+        self.simulatedTime += self.commandCosts.get(command, self.callCost)
+        if self.keepHistory:
+            self.history.append((command, args, flags))
+
+    def uniqueName(self, name):
+        base = name.replace("#", "").rstrip("0123456789") or "node"
+        while True:
+            self.nameCounters[base] += 1
+            candidate = "{base}{count}".format(base=base, count=self.nameCounters[base])
+            if candidate not in self.nodes:
+                return candidate
+
+    def createTransform(self, name, shape):
+        self.nodes[name] = {"translate": [0.0, 0.0, 0.0], "rotate": [0.0, 0.0, 0.0], "scale": [1.0, 1.0, 1.0],
+                            "visibility": True}
+        self.shapes[name] = shape
+        self.shapeUsers[shape] += 1
+        return name
+
+    # scene commands
+    def polyCube(self, *nodes, **flags):
+        if flags.get("edit"):
+            self.record("polyCube", nodes, flags)
+            for attr in ("width", "height", "depth"):
+                if attr in flags:
+                    self.nodes[nodes[0]][attr] = flags[attr]
+            return None
+        w, h, d, name = flags.pop("w", 1.0), flags.pop("h", 1.0), flags.pop("d", 1.0), flags.pop("name", "pCube#")
+        self.record("polyCube", (), dict(flags, w=w, h=h, d=d, name=name))
+        transform = self.uniqueName(name)
+        history = self.uniqueName("polyCube")
+        shape = transform + "Shape"
+        self.nodes[history] = {"width": w, "height": h, "depth": d}
+        self.nodeTypes[history] = "polyCube"
+        self.nodes[shape] = {}
+        self.connections[shape] = ["initialShadingGroup", history]
+        self.createTransform(transform, shape)
+        return [transform, history]
+
+    def instance(self, node, **flags):
+        self.record("instance", (node,), flags)
+        transform = self.createTransform(self.uniqueName(node), self.shapes[node])
+        self.nodes[transform] = {key: list(value) if isinstance(value, list) else value
+                                 for key, value in self.nodes[node].items()}
+        return [transform]
+
+    def createMesh(self, faceCount, name="tileMesh#"):
+        # used by the recording backend in place of the API
+        self.record("createMesh", (), {"name": name})
+        transform = self.uniqueName(name)
+        shape = transform + "Shape"
+        self.nodes[shape] = {"faceCount": faceCount}
+        self.createTransform(transform, shape)
+        return [transform, shape]
+
+    def xform(self, node, translation=None, rotation=None, scale=None, **flags):
+        self.record("xform", (node,), dict(flags, translation=translation, rotation=rotation, scale=scale))
+        for attr, value in (("translate", translation), ("rotate", rotation), ("scale", scale)):
+            if value is not None:
+                self.nodes[node][attr] = list(value)
+
+    def group(self, empty=False, name="group#", **flags):
+        self.record("group", (), dict(flags, empty=empty, name=name))
+        group = self.createTransform(self.uniqueName(name), None)
+        self.children[group] = {}
+        return group
+
+    def addAttr(self, node, longName=None, dataType=None, **flags):
+        self.record("addAttr", (node,), dict(flags, longName=longName, dataType=dataType))
+        self.nodes[node][longName] = None
+
+    def parent(self, nodes, group, **flags):
+        self.record("parent", (nodes, group), flags)
+        if isinstance(nodes, str):
+            nodes = [nodes]
+        for node in nodes:
+            self.parents[node] = group
+            self.children[group][node] = None
+        return list(nodes)
+
+    def move(self, x, y, z, *nodes, **flags):
+        self.record("move", (x, y, z) + nodes, flags)
+
+    def rotate(self, x, y, z, *nodes, **flags):
+        self.record("rotate", (x, y, z) + nodes, flags)
+
+    def setAttr(self, plug, *values, **flags):
+        self.record("setAttr", (plug,) + values, flags)
+        node, attr = plug.split(".", 1)
+        vector = re.match(r"(translate|rotate|scale)([XYZ])$", attr)
+        if vector:
+            self.nodes[node][vector.group(1)]["XYZ".index(vector.group(2))] = values[0]
+        else:
+            self.nodes[node][attr] = values[0] if len(values) == 1 else list(values)
+
+    def getAttr(self, plug, **flags):
+        self.record("getAttr", (plug,), flags)
+        node, attr = plug.split(".", 1)
+        vector = re.match(r"(translate|rotate|scale)([XYZ])$", attr)
+        if vector:
+            return self.nodes[node][vector.group(1)]["XYZ".index(vector.group(2))]
+        return self.nodes[node][attr]
+
+    def objExists(self, name):
+        self.record("objExists", (name,), {})
+        return name.split(".")[0] in self.nodes
+
+    def ls(self, *names, **flags):
+        self.record("ls", names, flags)
+        if flags.get("selection") or flags.get("sl"):
+            return list(self.selection)
+        if len(names) == 1 and not isinstance(names[0], str):
+            names = names[0]
+        # "*.attribute" lists the nodes that have the attribute
+        attrs = [name[2:] for name in names if name.startswith("*.")]
+        found = [node for node, values in self.nodes.items() if any(attr in values for attr in attrs)] if attrs else []
+        return found + [name for name in names if name in self.nodes]
+
+    def select(self, *names, **flags):
+        self.record("select", names, flags)
+        if len(names) == 1 and not isinstance(names[0], str):
+            names = names[0]
+        self.selection = list(names)
+
+    def delete(self, *names, **flags):
+        self.record("delete", names, flags)
+        if len(names) == 1 and not isinstance(names[0], str):
+            names = names[0]
+        self.removeNodes(names)
+
+    def removeNodes(self, names):
+        for name in names:
+            self.nodes.pop(name, None)
+            # groups take their children with them
+            children = self.children.pop(name, {})
+            if children:
+                self.removeNodes(list(children))
+            group = self.parents.pop(name, None)
+            if group in self.children:
+                del self.children[group][name]
+            shape = self.shapes.pop(name, None)
+            if shape is None:
+                continue
+            # the shape and its history go with the last transform using it
+            self.shapeUsers[shape] -= 1
+            if self.shapeUsers[shape] <= 0:
+                del self.shapeUsers[shape]
+                self.nodes.pop(shape, None)
+                for connected in self.connections.pop(shape, [])[1:]:
+                    self.nodes.pop(connected, None)
+
+    def rename(self, node, name, **flags):
+        self.record("rename", (node, name), flags)
+        newName = self.uniqueName(name)
+        self.nodes[newName] = self.nodes.pop(node)
+        self.shapes[newName] = self.shapes.pop(node)
+        return newName
+
+    def listRelatives(self, node, allParents=False, children=False, parent=False, **flags):
+        self.record("listRelatives", (node,), dict(flags, allParents=allParents, children=children, parent=parent))
+        if not isinstance(node, str):
+            node = node[0]
+        if children:
+            return list(self.children.get(node, [])) or None
+        if parent:
+            return [self.parents[node]] if node in self.parents else None
+        if allParents:
+            parents = [transform for transform, shape in self.shapes.items() if shape == node]
+            return parents or None
+        shape = self.shapes.get(node)
+        return [shape] if shape else None
+
+    def listConnections(self, nodes, type=None, **flags):
+        self.record("listConnections", (nodes,), dict(flags, type=type))
+        if nodes is None:
+            return None
+        if isinstance(nodes, str):
+            nodes = [nodes]
+        connected = []
+        for node in nodes:
+            connected.extend(self.connections.get(node, []))
+        if type is not None:
+            connected = [node for node in connected if self.nodeTypes.get(node) == type]
+        return connected or None
+
+    def polyListComponentConversion(self, items, toFace=False, **flags):
+        self.record("polyListComponentConversion", (items,), dict(flags, toFace=toFace))
+        faces = []
+        for item in items:
+            if "." in item:
+                faces.append(item)
+            elif "faceCount" in self.nodes.get(self.shapes.get(item), {}):
+                count = self.nodes[self.shapes[item]]["faceCount"]
+                faces.append("{mesh}.f[0:{last}]".format(mesh=item, last=count - 1))
+        return faces
+
+    def filterExpand(self, items, selectionMask=None, **flags):
+        self.record("filterExpand", (items,), dict(flags, selectionMask=selectionMask))
+        expanded = []
+        for item in items:
+            node, component = item.split(".", 1)
+            first, _, last = component[component.index("[") + 1:-1].partition(":")
+            expanded.extend("{node}.f[{index}]".format(node=node, index=index)
+                            for index in range(int(first), int(last or first) + 1))
+        return expanded or None
+
+    def undoInfo(self, openChunk=False, closeChunk=False, **flags):
+        self.record("undoInfo", (), dict(flags, openChunk=openChunk, closeChunk=closeChunk))
+        if openChunk:
+            self.openChunks += 1
+            self.undoChunks += 1
+        if closeChunk:
+            self.openChunks -= 1
+
+
+class RecordingBackend(MayaBackend):
+    # backend for tests and benchmarks, the scene only lives in memory
+    def __init__(self, cmds=None):
+        MayaBackend.__init__(self, cmds if cmds is not None else RecordingCmds())
+
+    def apply_mesh(self, operation, buffers, name):
+        transform, shape = self.cmds.createMesh(len(buffers.faceCounts), name)
+        self.cmds.nodes[shape]["points"] = np.array(buffers.points)
+        operation.result.append([transform, shape])
+
+    def transformValues(self, nodes, vector):
+        return np.array([self.cmds.nodes[node][vector] for node in nodes], dtype=float).reshape(-1, 3)
+
+    def apply_points(self, operation, mesh, indices, points):
+        self.cmds.record("setPoints", (mesh,), {})
+        shape = self.cmds.shapes[resolveNodes(mesh)[0]]
+        self.cmds.nodes[shape]["points"][np.asarray(indices)] = points
@@ -0,0 +1,128 @@
+# headless mesh export of a tile floor to OBJ or binary PLY, no Maya session required
+# the layout is computed (or read from a layout file) and written in blocks of rows, so memory only grows
+# with the block size, the mesh is the same as the merged mesh (and the polyCubes) the generator makes
+#
+#   python Tile_Export.py floor.obj --tiles 1000 1000 --seed 7
+#   python Tile_Export.py floor.ply --tiles 200 300 --seed 7 --set tileSizeXMin=1 tileSizeXMax=1.5
+#   python Tile_Export.py floor.ply --layout floor.tiles
+import argparse
+import os
+
+import numpy as np
+
+import Tile_Layout as tl
+import Tile_LayoutFile as tlf
+import Tile_Mesh as tm
+import Tile_Overlap as to
+
+BLOCK_SIZE = 10000  # tiles per block
+
+# binary PLY records, Maya stores points as 32 bit floats as well
+PLY_VERTEX = np.dtype([("position", "<f4", (3,))])
+PLY_FACE = np.dtype([("count", "u1"), ("vertices", "<i4", (tm.CUBE_FACES.shape[1],))])
+
+
+def writeOBJ(output, blocks):
+    # output is a text file, vertices and faces of every block are written before the next block is built
+    output.write("# tile floor\no tileFloor\n")
+    offset = 1  # OBJ indices start at 1
+    for block in blocks:
+        buffers = tm.buildMeshBuffers(block)
+        # 9 digits give back exactly the 32 bit float Maya would store
+        np.savetxt(output, buffers.points.astype(np.float32), fmt="v %.9g %.9g %.9g")
+        np.savetxt(output, buffers.faceConnects.reshape(-1, tm.CUBE_FACES.shape[1]) + offset, fmt="f %d %d %d %d")
+        offset += len(buffers.points)
+
+
+def writePLY(output, blocks, tileCount):
+    # output is a binary file, PLY wants all vertices before the faces,
+    # the faces only depend on the tile count, so they are written in chunks after the vertices
+    output.write("ply\nformat binary_little_endian 1.0\ncomment tile floor\n"
+                 "element vertex {points}\nproperty float x\nproperty float y\nproperty float z\n"
+                 "element face {faces}\nproperty list uchar int vertex_indices\nend_header\n".format(
+                     points=tileCount * tm.POINTS_PER_TILE, faces=tileCount * tm.FACES_PER_TILE).encode())
+    written = 0
+    for block in blocks:
+        vertices = np.empty(len(block) * tm.POINTS_PER_TILE, dtype=PLY_VERTEX)
+        vertices["position"] = tm.tilePoints(block.sizes, block.positions, block.rotations).reshape(-1, 3)
+        vertices.tofile(output)
+        written += len(block)
+    if written != tileCount:
+        raise ValueError("wrote {written} of {count} tiles".format(written=written, count=tileCount))
+
+    for start in range(0, tileCount, BLOCK_SIZE):
+        tiles = np.arange(start, min(start + BLOCK_SIZE, tileCount), dtype=np.int32)
+        faces = np.empty(len(tiles) * tm.FACES_PER_TILE, dtype=PLY_FACE)
+        faces["count"] = tm.CUBE_FACES.shape[1]
+        vertices = tm.CUBE_FACES[None, :, :] + tiles[:, None, None] * tm.POINTS_PER_TILE
+        faces["vertices"] = vertices.reshape(len(faces), -1)
+        faces.tofile(output)
+
+
+def exportMesh(path, blocks, tileCount):
+    # the format follows from the extension (.obj or .ply)
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".obj":
+        with open(path, "w") as output:
+            writeOBJ(output, blocks)
+    elif extension == ".ply":
+        with open(path, "wb") as output:
+            writePLY(output, blocks, tileCount)
+    else:
+        raise ValueError("can't export to {extension}, use .obj or .ply".format(extension=extension or path))
+
+
+def exportLayout(path, params, blockSize=BLOCK_SIZE, resolveOverlaps=False):
+    # the floor of params (a new random seed when params.seed is None), returns the seed used
+    # resolving overlaps needs the whole layout at once, the mesh is still written in blocks
+    if params.seed is None:
+        params = tl.LayoutParams.fromObject(params)
+        params.seed = tl.newSeed()
+    blocks = tl.iterRowBlocks(params, blockSize)
+    if resolveOverlaps:
+        layout = tl.computeLayout(params)
+        print(to.resolveOverlaps(layout, params))
+        blocks = (layout.rows(rowStart, rowStop) for rowStart, rowStop in tl.rowBlocks(params, blockSize))
+    exportMesh(path, blocks, int(params.tileX) * int(params.tileY))
+    return params.seed
+
+
+def exportLayoutFile(path, layoutPath, blockSize=BLOCK_SIZE):
+    # the floor stored in a layout file (see Tile_LayoutFile)
+    layoutFile = tlf.LayoutFile(layoutPath)
+    exportMesh(path, layoutFile.iterRowBlocks(blockSize), len(layoutFile))
+    return layoutFile.params.seed
+
+
+def parseParameter(text):
+    name, _, value = text.partition("=")
+    if name not in tl.LayoutParams.FIELDS or name in ("tileX", "tileY", "seed"):
+        raise argparse.ArgumentTypeError("unknown layout parameter: {name}".format(name=name))
+    return name, float(value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export a tile floor to OBJ or binary PLY without Maya")
+    parser.add_argument("output", help="file to write, .obj or .ply")
+    parser.add_argument("--tiles", nargs=2, type=int, metavar=("X", "Y"), default=(10, 5),
+                        help="tiles in X / Y direction (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0, help="0 picks a new random seed (default: %(default)s)")
+    parser.add_argument("--set", nargs="+", type=parseParameter, default=(), metavar="NAME=VALUE",
+                        help="other layout parameters, e.g. gapXmin=0.1 rotationZMax=5")
+    parser.add_argument("--layout", help="export this layout file instead of computing a layout")
+    parser.add_argument("--resolve-overlaps", action="store_true",
+                        help="change tiles that overlap their neighbours, within the min / max values")
+    parser.add_argument("--block-size", type=int, default=BLOCK_SIZE,
+                        help="tiles computed and written at once (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    if args.layout:
+        seed = exportLayoutFile(args.output, args.layout, args.block_size)
+    else:
+        params = tl.LayoutParams(tileX=args.tiles[0], tileY=args.tiles[1], seed=args.seed or None, **dict(args.set))
+        seed = exportLayout(args.output, params, args.block_size, args.resolve_overlaps)
+    print("exported {path} with seed {seed}".format(path=args.output, seed=seed))
+
+
+if __name__ == "__main__":
+    main()
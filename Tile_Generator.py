@@ -1,6 +1,49 @@
 import maya.cmds as cmd
+import concurrent.futures
 import functools as func
-import random as r
+import json
+import os
+import sys
+import threading
+import zlib
+import numpy as np
+
+import Tile_Cache as tca
+import Tile_Commit as tc
+import Tile_Layout as tl
+import Tile_LayoutFile as tlf
+import Tile_Mesh as tm
+import Tile_Overlap as to
+import Tile_Profile as tp
+import Tile_Registry as tr
+
+OUTPUT_CUBES = "cubes"  # one polyCube per tile
+OUTPUT_INSTANCED = "instanced"  # one unit polyCube, every tile is a scaled instance of it
+OUTPUT_MERGED = "merged"  # all tiles in one mesh
+OUTPUT_MODES = (OUTPUT_CUBES, OUTPUT_INSTANCED, OUTPUT_MERGED)  # same order as the radio buttons in the UI
+
+LAYOUT_FILE_FILTER = "Tile layout (*.tiles)"
+PREVIEW_DELAY = .15  # seconds without changes before the live preview updates
+
+# scene attribute of every layout column: (index in the generated tile, attribute)
+# a generated cube is [transform, polyCube], sizeX is the width, sizeY the depth and sizeZ the height
+CUBE_ATTRIBUTES = {"sizeX": (1, "width"), "sizeY": (1, "depth"), "sizeZ": (1, "height"),
+                   "positionX": (0, "translateX"), "height": (0, "translateY"), "positionZ": (0, "translateZ"),
+                   "rotX": (0, "rotateX"), "rotY": (0, "rotateY"), "rotZ": (0, "rotateZ")}
+# an instanced tile is [transform], its size is the scale
+INSTANCE_ATTRIBUTES = dict(CUBE_ATTRIBUTES, sizeX=(0, "scaleX"), sizeY=(0, "scaleZ"), sizeZ=(0, "scaleY"))
+
+
+def workerExecutable():
+    # python for the worker processes: the running interpreter (mayapy or python), or mayapy next to Maya,
+    # None when there is none, inside Maya sys.executable is Maya itself and every worker would start a Maya
+    if os.path.basename(sys.executable).lower().startswith(("python", "mayapy")):
+        return sys.executable
+    folder = os.path.dirname(sys.executable)
+    for name in ("mayapy.exe", "mayapy"):
+        if os.path.isfile(os.path.join(folder, name)):
+            return os.path.join(folder, name)
+    return None
 
 
 class TileGenerator:
@@ -57,58 +100,718 @@ class TileGenerator:
         self.keepRotY = False
         self.keepRotZ = False
 
-        self.generatedTiles = []
-
-    def generateTiles(self, UI, *args):
-        # get latest values from the UI
-        self.updateValues(UI)
+        self.outputMode = OUTPUT_CUBES
+        self.seed = 0  # 0 picks a new random seed on every generate
+
+        # seed and tiles of the last generation, so re-generating them is reproducible
+        self.layoutSeed = tl.newSeed()
+        self.tileNodes = {}  # (i, j) -> generated tile of the current grid
+        self.registry = tr.TileRegistry()  # every generated tile that is still in the scene
+        self.reGenerations = 0  # re-gen passes since the last generate, each pass draws a new variant
+
+        self.blockSize = 10000  # tiles computed and committed at once, bigger grids are streamed in blocks
+        self.layoutProcesses = 1  # processes computing the layout of big grids, 1 computes it in Maya, 0 uses every core
+        self.resolveOverlaps = False  # change tiles that overlap their neighbours after the layout is computed
+        self.overlapReport = None  # to.OverlapReport of the last resolved layout
+        self.profiler = tp.Profiler()  # switch on for per phase timings, see Tile_Profile
+        self.layoutCache = tca.LayoutCache()  # layouts of earlier parameter sets, going back to one skips sampling
+
+        # parameters and output mode of the tiles in the scene, generate only updates what changed
+        self.currentParams = None
+        self.currentMode = None
+        self.instanceSource = None
+        self.currentGroup = None  # group holding the last generation
+        self.currentResolved = False
+
+        self.previewMesh = None  # proxy mesh of the live preview
+        self.previewCount = 0
+        self.previewParams = None
+        self.previewResolved = False
+        self.previewLimit = 100000  # tiles shown at most by the preview
 
-        if self.clear:
-            self.clearTiles()
-
-        # reset Array
-        # if it was not empty yet by the clearTiles function
         self.generatedTiles = []
+        self.mergedLayouts = {}  # merged mesh transform -> layout it was built from
 
-        offsetX = .0
-        gapsX = .0
-        for i in range(self.tileX):  # generates the X direction of the tiles
-            offsetY = 0.0  # reset offset
-            gapsY = 0.0  # reset gaps
-            gapX = r.uniform(self.gapXmin, self.gapXmax)  # variation in the x axis
-
-            sizeX = r.uniform(self.tileSizeXMin, self.tileSizeXMax)
-            offsetX += sizeX / 2
-            gapsX += gapX
-
-            if i != 0:  # increment offset
-                offsetX += sizeX / 2
-
-            for j in range(self.tileY):  # generates the Y direction of the tiles
-                sizeY = r.uniform(self.tileSizeYMin, self.tileSizeYMax)
-                offsetY += sizeY / 2
-                sizeZ = r.uniform(self.tileSizeZMin, self.tileSizeZMax)
+        # every scene edit goes through the backend, swap it for a tc.RecordingBackend to run without Maya
+        self.backend = tc.MayaBackend(cmd)
 
-                if j != 0:  # gap y direction
-                    gapsY += r.uniform(self.gapYmin, self.gapYmax)
+        # pick up the generations that are already in the scene (e.g. after reopening it)
+        self.loadGenerations()
 
-                heightOffset = r.uniform(self.heightVariationMin, self.heightVariationMax)
-                rotX = r.uniform(self.rotationXMin, self.rotationXMax)
-                rotY = r.uniform(self.rotationYMin, self.rotationYMax)
-                rotZ = r.uniform(self.rotationZMin, self.rotationZMax)
-
-                if j != 0:  # increment offset
-                    offsetY += sizeY / 2
-
-                # spawn polyCube with the generated variables
-                self.generatedTiles.append(cmd.polyCube(d=sizeY, w=sizeX, h=sizeZ))
-                cmd.move(offsetX + gapsX, heightOffset, offsetY + gapsY)
-                cmd.rotate(rotX, rotY, rotZ)
+    @tp.profiled("generateTiles")
+    def generateTiles(self, UI, *args):
+        # get latest values from the UI
+        with self.profiler.phase("updateValues"):
+            self.updateValues(UI)
+        if self.previewParams is not None:
+            self.acceptPreview()  # the previewed layout (and its seed) becomes the real tiles
+        else:
+            self.buildTiles()
+
+    @tp.profiled("generateTiles")
+    def buildTiles(self, params=None):
+        # generates with the current values (or the given parameters), without touching the UI
+        if params is None:
+            params = self.resolveSeed(self.layoutParams(), self.currentParams)
+
+        with self.profiler.phase("update"):
+            if self.clear and self.updateTiles(params):
+                return
+
+        print("generating tiles with seed {seed}".format(seed=params.seed))
+
+        # the grid is computed and committed in blocks of rows, so memory only grows with the block size,
+        # unless the whole layout is needed at once (overlaps are resolved, it is computed in parallel or it
+        # becomes one merged mesh)
+        tileCount = int(params.tileX) * int(params.tileY)
+        if self.outputMode == OUTPUT_MERGED:
+            blocks = [self.fullLayout(params)]
+        elif self.resolveOverlaps or (self.layoutProcesses != 1 and tileCount > self.blockSize):
+            layout = self.fullLayout(params)
+            blocks = [layout.rows(rowStart, rowStop) for rowStart, rowStop in tl.rowBlocks(params, self.blockSize)]
+        else:
+            blocks = self.layoutBlocks(params)
+        self.commitLayout(params, blocks, tileCount, self.resolveOverlaps)
+
+    def resolveSeed(self, params, previous):
+        # a tweaked parameter keeps the seed (and with it every value the tweak doesn't affect),
+        # generating again without any change rolls a new layout
+        if params.seed is None:
+            params.seed = previous.seed if previous is not None and not self.sameParams(previous, params) else None
+            if params.seed is None:
+                params.seed = tl.newSeed()
+        return params
+
+    @tp.profiled("preview")
+    def previewTiles(self):
+        # cheap live preview of the current values: one merged proxy mesh, outside of undo,
+        # only its points are rewritten while the tile count stays the same
+        # big grids only preview the rows that fit in previewLimit tiles
+        scene = self.backend.cmds
+        old = self.previewParams
+        params = self.layoutParams()
+        if params.seed is None:
+            params.seed = old.seed if old is not None else tl.newSeed()  # the preview keeps its seed while tweaking
+        exists = self.previewMesh is not None and scene.objExists(self.previewMesh)
+        if exists and old.values() == params.values() and self.previewResolved == self.resolveOverlaps:
+            return
+
+        rows = min(int(params.tileX), max(1, self.previewLimit // max(1, int(params.tileY))))
+        # previewing every row gives the layout Generate uses, so accepting it comes from the cache
+        key = tca.layoutKey(params, self.resolveOverlaps, rows)
+        cached = self.cachedLayout(key, rows * int(params.tileY))
+        if cached is not None:
+            layout = cached[0]
+        else:
+            layout = tl.computeRows(params, 0, rows)
+            report = None
+            if self.resolveOverlaps:
+                # only the previewed rows, tiles of later rows are not there yet
+                report = to.resolveOverlaps(layout, params)
+            self.layoutCache.put(key, layout, report)
+        batch = tc.SceneBatch("previewTiles")
+        mesh = None
+        if exists and len(layout) == self.previewCount:
+            points = tm.tilePoints(layout.sizes, layout.positions, layout.rotations).reshape(-1, 3)
+            batch.setPoints(self.previewMesh, np.arange(len(points)), points)
+        else:
+            # the tile count changed, the proxy is built again
+            if exists:
+                batch.delete([self.previewMesh])
+            self.previewMesh = None
+            if len(layout):
+                mesh = batch.createMesh(tm.buildMeshBuffers(layout), name="tilePreview#")
+                batch.setAttrs(mesh, "overrideEnabled", True)
+                batch.setAttrs(mesh, "overrideShading", False)  # wireframe, so it reads as a proxy
+
+        # previews are not undo steps, only the accepted tiles are
+        scene.undoInfo(stateWithoutFlush=False)
+        try:
+            self.backend.commit(batch)
+        finally:
+            scene.undoInfo(stateWithoutFlush=True)
+
+        if mesh is not None:
+            self.previewMesh = mesh.nodes()[0]
+        self.previewCount = len(layout)
+        self.previewParams = params
+        self.previewResolved = self.resolveOverlaps
+        if rows < int(params.tileX):
+            print("previewing the first {rows} of {total} rows".format(rows=rows, total=int(params.tileX)))
+
+    def removePreview(self):
+        if self.previewMesh is not None:
+            scene = self.backend.cmds
+            batch = tc.SceneBatch("previewTiles")
+            batch.delete([self.previewMesh])
+            scene.undoInfo(stateWithoutFlush=False)
+            try:
+                self.backend.commit(batch)
+            finally:
+                scene.undoInfo(stateWithoutFlush=True)
+        self.previewMesh = None
+        self.previewCount = 0
+        self.previewParams = None
+
+    def acceptPreview(self):
+        # replaces the preview by real tiles with the current values and the seed of the preview,
+        # so values changed after the last preview update (e.g. within PREVIEW_DELAY) are not lost
+        previewed = self.previewParams
+        self.removePreview()
+        if previewed is not None:
+            params = self.layoutParams()
+            if params.seed is None:
+                params.seed = previewed.seed
+            self.buildTiles(params)
+
+    def commitLayout(self, params, blocks, tileCount, resolved=False):
+        # replaces the last generation (when clearing) by a new one made of the given row blocks,
+        # big floors show progress and can be cancelled (tiles committed so far are kept)
+        # all tiles of a merged generation go into one mesh, so its blocks are joined and committed at once
+        scene = self.backend.cmds
+        self.layoutSeed = params.seed
+        self.reGenerations = 0
+        merged = self.outputMode == OUTPUT_MERGED
+        if merged:
+            with self.profiler.phase("layout"):
+                joined = tl.joinRows(blocks)
+            blocks = [joined] if joined is not None and len(joined) else []
+
+        # clearing and all blocks are one undo, every batch is a nested chunk inside it
+        scene.undoInfo(openChunk=True, chunkName="generateTiles")
+        try:
+            # every generation gets its own group, tagged with the parameters and seed
+            batch = tc.SceneBatch("generateTiles")
+            if self.clear:
+                self.queueClear(batch)
+            group = batch.createGroup("tileGeneration#", ((tr.GENERATION_ATTR, "string"), (tr.INDEX_ATTR, "Int32Array")))
+            batch.setData(group, tr.GENERATION_ATTR, tr.generationData(params, self.outputMode, resolved), "string")
+            self.backend.commit(batch)
+
+            # reset Array
+            # if it was not empty yet by the clearTiles function
+            self.generatedTiles = []
+            self.tileNodes = {}
+            self.currentParams = params
+            self.currentMode = self.outputMode
+            self.currentGroup = group.nodes()[0]
+            self.currentResolved = resolved
+            self.instanceSource = None
+
+            self.commitBlocks(blocks, tileCount, self.generateBlock, "generating tiles", not merged)
+
+            batch = tc.SceneBatch("generateTiles")
+            if self.instanceSource is not None:
+                # hide the source only after all blocks are instanced, instances copy its visibility
+                batch.setAttrs(self.instanceSource, "visibility", False)
+            batch.setData(self.currentGroup, tr.INDEX_ATTR, self.generationIndices(), "Int32Array")
+            self.backend.commit(batch)
+        finally:
+            scene.undoInfo(closeChunk=True)
+
+    def commitBlocks(self, blocks, tileCount, commit, status, showProgress=True):
+        # calls commit for every block, big floors show progress and can be cancelled (tiles committed so far
+        # are kept), returns False when cancelled
+        scene = self.backend.cmds
+        showProgress = showProgress and tileCount > self.blockSize
+        if showProgress:
+            scene.progressWindow(title="Tile Generator", progress=0, maxValue=tileCount, isInterruptable=True,
+                                 status="{status} (esc to cancel)".format(status=status))
+        try:
+            done = 0
+            blocks = iter(blocks)
+            while True:
+                with self.profiler.phase("layout"):  # streamed blocks are computed on demand
+                    block = next(blocks, None)
+                if block is None:
+                    return True
+                commit(block)
+                done += len(block)
+
+                if showProgress:
+                    scene.progressWindow(edit=True, progress=done,
+                                         status="{status}: {done} / {total}".format(status=status, done=done,
+                                                                                    total=tileCount))
+                    if scene.progressWindow(query=True, isCancelled=True):
+                        print("cancelled after {done} of {total} tiles".format(done=done, total=tileCount))
+                        return False
+        finally:
+            if showProgress:
+                scene.progressWindow(endProgress=True)
+
+    def generateBlock(self, block):
+        self.instanceSource = self.commitBlock(tc.SceneBatch("generateTiles"), block, self.instanceSource)
+        self.profiler.count("tiles", len(block))
+
+    @tp.profiled("exportLayout")
+    def exportLayout(self, path):
+        # saves the layout of the last generation, recomputed from its parameters and seed
+        # (tiles changed with Re-Gen afterwards keep their generated values in the file)
+        if self.currentGroup is None:
+            print("nothing to export, generate tiles first")
+            return
+        data = json.loads(self.backend.cmds.getAttr("{group}.{attr}".format(group=self.currentGroup,
+                                                                            attr=tr.GENERATION_ATTR)))
+        params = tl.LayoutParams(**data["params"])
+        resolved = data.get("resolveOverlaps", False)
+        blocks = [self.fullLayout(params, resolved)] if resolved else self.layoutBlocks(params)
+        tlf.saveLayout(path, params, blocks, resolved)
+        print("exported {count} tiles to {path}".format(count=int(params.tileX) * int(params.tileY), path=path))
+
+    @tp.profiled("replayLayout")
+    def replayLayout(self, path, rowStart=0, rowStop=None):
+        # generates the tiles of a saved layout (or of the rows rowStart up to rowStop of it)
+        layoutFile = tlf.LayoutFile(path)
+        rowStop = layoutFile.tileX if rowStop is None else min(rowStop, layoutFile.tileX)
+        print("replaying rows {start} to {stop} of {path} (seed {seed})".format(start=rowStart, stop=rowStop,
+                                                                               path=path, seed=layoutFile.params.seed))
+        self.commitLayout(layoutFile.params, layoutFile.iterRowBlocks(self.blockSize, rowStart, rowStop),
+                          (rowStop - rowStart) * layoutFile.tileY, layoutFile.resolved)
+        if (rowStart, rowStop) != (0, layoutFile.tileX):
+            self.currentParams = None  # only part of the grid exists, the next generate builds it completely
+
+    def fullLayout(self, params, resolve=None):
+        # the whole layout, computed before the scene is touched, by a process pool for big grids if wanted,
+        # overlapping tiles are resolved when resolveOverlaps is on
+        # a layout computed before with the same parameters and seed comes from the cache
+        resolve = self.resolveOverlaps if resolve is None else resolve
+        key = tca.layoutKey(params, resolve)
+        cached = self.cachedLayout(key, int(params.tileX) * int(params.tileY))
+        if cached is not None:
+            layout, report = cached
+            if report is not None:
+                self.overlapReport = report
+            return layout
+
+        layout = None
+        if self.layoutProcesses != 1 and int(params.tileX) * int(params.tileY) > self.blockSize:
+            executable = workerExecutable()
+            if executable is None:
+                print("computing the layout in this process, no mayapy found for the process pool")
+            else:
+                try:
+                    layout = tl.computeLayoutParallel(params, self.layoutProcesses or None, self.blockSize,
+                                                      executable)
+                except (OSError, concurrent.futures.BrokenExecutor) as error:
+                    print("computing the layout in this process, the process pool failed: {error}".format(
+                        error=error))
+        if layout is None:
+            with self.profiler.phase("layout"):
+                layout = tl.computeLayout(params)
+        report = None
+        if resolve:
+            with self.profiler.phase("resolveOverlaps"):
+                self.overlapReport = report = to.resolveOverlaps(layout, params)
+            print(self.overlapReport)
+        self.layoutCache.put(key, layout, report)
+        return layout
+
+    def layoutBlocks(self, params):
+        # the unresolved layout in blocks of rows, only to be read: a layout computed before comes from the cache,
+        # otherwise the blocks are computed one at a time and, when the layout fits in the cache, cached as a whole
+        # after the last block, so memory stays bounded by the block size or the cache budget
+        tileCount = int(params.tileX) * int(params.tileY)
+        key = tca.layoutKey(params)
+        cached = self.cachedLayout(key, tileCount, copy=False)
+        if cached is not None:
+            layout = cached[0]
+            return [layout.rows(rowStart, rowStop) for rowStart, rowStop in tl.rowBlocks(params, self.blockSize)]
+        if not self.layoutCache.fits(tileCount):
+            return tl.iterRowBlocks(params, self.blockSize)
+        return self.cachingBlocks(params, key)
+
+    def cachingBlocks(self, params, key):
+        # streams the blocks of a layout and caches them joined once the last one was used
+        blocks = []
+        for block in tl.iterRowBlocks(params, self.blockSize):
+            blocks.append(block)
+            yield block
+        layout = tl.joinRows(blocks)
+        if layout is not None:
+            self.layoutCache.put(key, layout, copy=False)  # the joined arrays belong to no block
+
+    def cachedLayout(self, key, tileCount, copy=True):
+        # (layout, overlap report) from the layout cache, None on a miss or when the layout is too big to cache
+        if not self.layoutCache.fits(tileCount):
+            return None
+        cached = self.layoutCache.get(key, copy)
+        self.profiler.count("cacheHits" if cached is not None else "cacheMisses")
+        return cached
+
+    def commitBlock(self, batch, layout, source=None):
+        # creates the tiles of one block and registers them, returns the instance source (if any)
+        if self.outputMode == OUTPUT_MERGED:
+            with self.profiler.phase("meshBuffers"):
+                buffers = tm.buildMeshBuffers(layout)
+            mesh = batch.createMesh(buffers)
+        elif self.outputMode == OUTPUT_INSTANCED:
+            if source is None:
+                # one unit cube as source for the whole generation
+                source = batch.createCubes([(1, 1, 1)], name="tileSource#")
+            tiles = batch.createInstances(source, len(layout))
+            # sizeX is the width, sizeY the depth and sizeZ the height, same as the polyCube call
+            batch.setTransforms(tiles, layout.positions, layout.rotations, layout.sizes[:, [0, 2, 1]])
+        else:
+            # sizeX is the width, sizeY the depth and sizeZ the height of the polyCube
+            tiles = batch.createCubes(layout.sizes[:, [0, 2, 1]])
+            batch.setTransforms(tiles, layout.positions, layout.rotations)
+
+        # children are parented in the same order as generatedTiles, the index attribute relies on it
+        if self.outputMode == OUTPUT_MERGED:
+            batch.parent([mesh], self.currentGroup)
+        elif isinstance(source, tc.Operation):
+            batch.parent([source, tiles], self.currentGroup)
+        else:
+            batch.parent([tiles], self.currentGroup)
+        self.backend.commit(batch)
+
+        if self.outputMode == OUTPUT_MERGED:
+            self.mergedLayouts[mesh.result[0][0]] = layout
+            self.generatedTiles.extend(mesh.result)
+            self.registry.addNodes(mesh.nodes(), self.currentGroup)
+            return source
+
+        if isinstance(source, tc.Operation):
+            # from now on the source is referenced by name
+            self.generatedTiles.extend(source.result)
+            self.registry.addNodes(source.nodes(), self.currentGroup)
+            source = source.nodes()[0]
+        self.generatedTiles.extend(tiles.result)
+        indices = list(map(tuple, layout.gridIndices().tolist()))
+        with self.profiler.phase("registry"):
+            self.registry.add(tiles.result, indices, layout.seed, self.outputMode == OUTPUT_INSTANCED,
+                              self.currentGroup)
+        self.tileNodes.update(zip(indices, tiles.result))
+        return source
+
+    def generationIndices(self):
+        # flat (i, j) of every child of the current generation group, in child order
+        # merged meshes store (first row, rows) of their block instead
+        indices = []
+        for tile in self.generatedTiles:
+            if tile[0] in self.mergedLayouts:
+                layout = self.mergedLayouts[tile[0]]
+                indices.extend((layout.rowStart, layout.tileX))
+            elif tile[0] in self.registry:
+                indices.extend(self.registry.records[tile[0]][:2])
+            else:
+                indices.extend(tr.SOURCE_INDEX)
+        return indices
+
+    def loadGenerations(self):
+        # registers every generation group in the scene, the newest one becomes the current generation
+        self.registry.clear()
+        generations = tr.findGenerations(self.backend.cmds)
+        for group, data in generations:
+            self.restoreGeneration(group, data)
+        if generations:
+            self.activateGeneration(*generations[-1])
+
+    def syncWithScene(self, *args):
+        # undo / redo change the scene behind the generator's back, so the generations are compared with the groups
+        # in the scene: generations that are gone are forgotten, generations whose children changed are read again,
+        # unchanged generations keep their records (and the polyCubes looked up for them)
+        # merged meshes that still exist keep their layout, their points are not part of the undo queue
+        scene = self.backend.cmds
+        generations = tr.findGenerations(scene)
+        groups = set(group for group, data in generations)
+        for group in [group for group in self.registry.generations if group is not None and group not in groups]:
+            for node in self.registry.removeGeneration(group):
+                self.mergedLayouts.pop(node, None)
+
+        changed = set()
+        for group, data in generations:
+            children = set(tr.readGeneration(scene, group)[0])
+            known = self.registry.generations.get(group, set())
+            if children == known:
+                continue
+            changed.add(group)
+            gone = known - children
+            self.registry.removeNodes(gone, group)
+            for node in gone:
+                self.mergedLayouts.pop(node, None)
+            self.restoreGeneration(group, data)
+
+        if not generations:
+            self.generatedTiles = []
+            self.tileNodes = {}
+            self.currentParams = None
+            self.currentGroup = None
+            self.instanceSource = None
+            return
+        group, data = generations[-1]
+        if group != self.currentGroup or group in changed or not self.describesCurrent(data):
+            self.activateGeneration(group, data)
+
+    def describesCurrent(self, data):
+        # true when the data of a generation group matches the tiles the generator thinks are in it
+        if self.currentParams is None:
+            return True  # nothing is known about the tiles, the next generate rebuilds them anyway
+        params = dict(zip(self.currentParams.FIELDS, self.currentParams.values()))
+        return (data["mode"] == self.currentMode and data["params"] == params and
+                data.get("resolveOverlaps", False) == self.currentResolved)
+
+    def restoreGeneration(self, group, data):
+        # registers the tiles of a generation group, tiles that are already registered keep their record
+        children, indices = tr.readGeneration(self.backend.cmds, group)
+        self.registry.addNodes(children, group)
+        if indices is None:
+            return
+        if data["mode"] == OUTPUT_MERGED:
+            # merged meshes store the rows they hold, the layout of those rows follows from the parameters
+            params = tl.LayoutParams(**data["params"])
+            layout = self.fullLayout(params, True) if data.get("resolveOverlaps") else None
+            for child, (rowStart, rows) in zip(children, indices.tolist()):
+                if child in self.mergedLayouts:
+                    continue
+                if layout is not None:
+                    self.mergedLayouts[child] = layout.rows(rowStart, rowStart + rows)
+                else:
+                    self.mergedLayouts[child] = tl.computeRows(params, rowStart, rowStart + rows)
+            return
+        restored = [(child, tuple(index)) for child, index in zip(children, indices.tolist())
+                    if tuple(index) != tr.SOURCE_INDEX and child not in self.registry]
+        self.registry.add([[child] for child, index in restored], [index for child, index in restored],
+                          data["params"]["seed"], data["mode"] == OUTPUT_INSTANCED, group)
+
+    def activateGeneration(self, group, data):
+        # makes a generation from the scene the current one, so clearTiles and Re-Gen work on it
+        # tiles made in this session (and instances) can be updated in place again, for tiles restored from the
+        # scene the polyCubes aren't known yet, so the next generate rebuilds them
+        children, indices = tr.readGeneration(self.backend.cmds, group)
+
+        self.currentGroup = group
+        self.currentParams = None
+        self.currentMode = data["mode"]
+        self.currentResolved = data.get("resolveOverlaps", False)
+        self.layoutSeed = data["params"]["seed"]
+        self.generatedTiles = [[child] for child in children]
+        self.tileNodes = {}
+        self.instanceSource = None
+        if indices is not None and data["mode"] == OUTPUT_INSTANCED:
+            sources = [child for child, index in zip(children, indices.tolist()) if tuple(index) == tr.SOURCE_INDEX]
+            self.instanceSource = (sources or [None])[0]
+
+        records = [(child, self.registry.records[child]) for child in children if child in self.registry]
+        if (data["mode"] != OUTPUT_MERGED and records and
+                all(record[2] == self.layoutSeed and (record[4] or record[3] is not None) for child, record in records)):
+            self.tileNodes = {record[:2]: [child] if record[4] else [child, record[3]] for child, record in records}
+            self.currentParams = tl.LayoutParams(**data["params"])
+
+    def updateTiles(self, params):
+        # incremental generate: only the attributes affected by the changed parameters are rewritten,
+        # tiles are only created / deleted for rows and columns that were added / removed
+        # returns False when the tiles in the scene can't be updated and have to be generated again
+        old = self.currentParams
+        if old is None or self.outputMode != self.currentMode or not self.generatedTiles:
+            return False
+        if self.resolveOverlaps or self.currentResolved:
+            return False  # resolving depends on all tiles, a single changed column can move any tile
+        if self.outputMode == OUTPUT_MERGED:
+            return self.updateMergedTiles(params)
+
+        # tiles deleted or renamed by hand can't be updated
+        scene = self.backend.cmds
+        transforms = [tile[0] for tile in self.tileNodes.values()]
+        if not transforms or len(scene.ls(transforms)) != len(transforms):
+            return False
+
+        # a new seed changes every value of every tile, and a polyCube that changes its size and its transform
+        # costs as many commands as a new one, so both are faster generated again
+        columns = tl.changedColumns(old, params)
+        if params.seed != old.seed:
+            return False
+        sizes = [column for column in columns if CUBE_ATTRIBUTES[column][0] == 1]
+        if self.outputMode == OUTPUT_CUBES and sizes and len(sizes) < len(columns):
+            return False
+
+        tileX = int(params.tileX)
+        tileY = int(params.tileY)
+        removed = [index for index in self.tileNodes if index[0] >= tileX or index[1] >= tileY]
+        print("updating tiles: {columns} changed, {removed} tiles removed".format(
+            columns=", ".join(sorted(columns)) or "nothing", removed=len(removed)))
+
+        scene.undoInfo(openChunk=True, chunkName="updateTiles")
+        try:
+            batch = tc.SceneBatch("updateTiles")
+            if removed:
+                self.queueRemoveTiles(batch, removed)
+            if self.instanceSource is not None:
+                # new instances copy the visibility of the source
+                batch.setAttrs(self.instanceSource, "visibility", True)
+            self.backend.commit(batch)
+
+            complete = self.commitBlocks(self.layoutBlocks(params), tileX * tileY,
+                                         func.partial(self.updateBlock, columns=columns), "updating tiles")
+
+            batch = tc.SceneBatch("updateTiles")
+            if self.instanceSource is not None:
+                batch.setAttrs(self.instanceSource, "visibility", False)
+            self.queueGenerationData(batch, params)
+            self.backend.commit(batch)
+        finally:
+            scene.undoInfo(closeChunk=True)
+
+        # a cancelled update leaves tiles with old values, the next generate builds them again
+        self.currentParams = params if complete else None
+        return True
+
+    def updateBlock(self, block, columns):
+        # rewrites the changed columns of the tiles of a block that exist, creates the others
+        batch = tc.SceneBatch("updateTiles")
+        existing = np.array([index in self.tileNodes for index in map(tuple, block.gridIndices().tolist())],
+                            dtype=bool)
+        if columns and existing.any():
+            self.queueTileColumns(batch, block.take(existing), columns)
+        if not existing.all():
+            self.instanceSource = self.commitBlock(batch, block.take(~existing), self.instanceSource)
+        else:
+            self.backend.commit(batch)
+
+    def queueGenerationData(self, batch, params):
+        # the group of the current generation always describes the tiles in it
+        batch.setData(self.currentGroup, tr.GENERATION_ATTR, tr.generationData(params, self.outputMode), "string")
+        batch.setData(self.currentGroup, tr.INDEX_ATTR, self.generationIndices(), "Int32Array")
+
+    def queueTileColumns(self, batch, layout, columns):
+        # rewrites the given layout columns on tiles that already exist,
+        # with one xform per tile (scale included for instances) and one edit per polyCube
+        attributes = INSTANCE_ATTRIBUTES if self.outputMode == OUTPUT_INSTANCED else CUBE_ATTRIBUTES
+        tiles = [self.tileNodes[index] for index in map(tuple, layout.gridIndices().tolist())]
+        sizes = {}
+        attrs = {}
+        for column in sorted(columns):
+            node, attr = attributes[column]
+            array, position = tl.LAYOUT_COLUMNS[column]
+            (sizes if node == 1 else attrs)[attr] = getattr(layout, array)[:, position]
+        if sizes:
+            batch.setCubeSizes([tile[1] for tile in tiles], sizes)
+        if attrs:
+            batch.setTransformAttrs([tile[0] for tile in tiles], attrs)
+
+    def queueRemoveTiles(self, batch, indices):
+        removed = [self.tileNodes.pop(index) for index in indices]
+        batch.delete([node for tile in removed for node in tile])
+
+        transforms = set(tile[0] for tile in removed)
+        self.registry.remove(transforms)
+        self.generatedTiles = [tile for tile in self.generatedTiles if tile[0] not in transforms]
+
+    def updateMergedTiles(self, params):
+        # the merged meshes keep their topology, only the points of the changed columns are rewritten
+        old = self.currentParams
+        meshes = [tile[0] for tile in self.generatedTiles if tile[0] in self.mergedLayouts]
+        if (old.tileX, old.tileY) != (params.tileX, params.tileY) or not meshes:
+            return False
+        if sum(self.mergedLayouts[mesh].tileX for mesh in meshes) != int(old.tileX):
+            return False  # not every row was built (e.g. cancelled), generating again builds them all
+        if len(self.backend.cmds.ls(meshes)) != len(meshes):
+            return False
+
+        columns = tl.changedColumns(old, params)
+        print("updating merged tiles: {columns} changed".format(columns=", ".join(sorted(columns)) or "nothing"))
+        batch = tc.SceneBatch("updateTiles")
+        if columns:
+            full = self.fullLayout(params, False)  # the merged meshes hold the whole grid anyway
+            for mesh in meshes:
+                layout = self.mergedLayouts[mesh]
+                new = full.rows(layout.rowStart, layout.rowStart + layout.tileX)
+                for column in columns:
+                    array, position = tl.LAYOUT_COLUMNS[column]
+                    getattr(layout, array)[:, position] = getattr(new, array)[:, position]
+                points = tm.tilePoints(layout.sizes, layout.positions, layout.rotations).reshape(-1, 3)
+                batch.setPoints(mesh, np.arange(len(points)), points)
+        self.queueGenerationData(batch, params)
+        self.backend.commit(batch)
+
+        self.currentParams = params
+        return True
 
+    @staticmethod
+    def sameParams(a, b):
+        # true when two parameter sets only differ in their seed
+        b = tl.LayoutParams.fromObject(b)
+        b.seed = a.seed
+        return b.values() == a.values()
+
+    def layoutParams(self):
+        # the values of this generator as a plain parameter object for the layout engine
+        params = tl.LayoutParams.fromObject(self)
+        params.seed = self.seed or None
+        return params
+
+    @tp.profiled("clearTiles")
     def clearTiles(self, *args):
-        for i in range(len(self.generatedTiles)):
-            if cmd.objExists(self.generatedTiles[i][1]):
-                cmd.delete(self.generatedTiles[i])
+        # clears the last generation, the one before it becomes the last generation
+        batch = tc.SceneBatch("clearTiles")
+        self.queueClear(batch)
+        self.backend.commit(batch)
+        self.activatePrevious()
+
+    def activatePrevious(self):
+        # after the last generation was cleared, the one before it becomes the last generation
+        previous = [group for group in self.registry.generations if group is not None]
+        if previous:
+            data = json.loads(self.backend.cmds.getAttr("{group}.{attr}".format(group=previous[-1],
+                                                                                attr=tr.GENERATION_ATTR)))
+            with self.profiler.phase("activate"):
+                self.activateGeneration(previous[-1], data)
+
+    def clearGeneration(self, group):
+        # any generation is cleared with a single delete of its group
+        batch = tc.SceneBatch("clearTiles")
+        current = self.queueClearGeneration(batch, group)
+        self.backend.commit(batch)
+        if current:
+            self.activatePrevious()
+
+    def queueClearGeneration(self, batch, group):
+        # returns True when it is the last generation
+        if group == self.currentGroup:
+            self.queueClear(batch)
+            return True
+        batch.delete([group])
+        for node in self.registry.removeGeneration(group):
+            self.mergedLayouts.pop(node, None)
+        return False
+
+    @tp.profiled("clearTiles")
+    def clearSelectedGenerations(self, *args):
+        # clears every generation that has a selected tile (or the selected generation groups), as a single undo
+        scene = self.backend.cmds
+        groups = []
+        for item in scene.ls(selection=True):
+            item = item.split(".")[0]
+            if item in self.registry.generations:
+                group = item
+            elif item in self.registry:
+                group = self.registry.records[item][5]
+            else:
+                group = (scene.listRelatives(item, parent=True) or [None])[0]
+            if group is not None and group in self.registry.generations and group not in groups:
+                groups.append(group)
+        batch = tc.SceneBatch("clearTiles")
+        current = [self.queueClearGeneration(batch, group) for group in groups]
+        self.backend.commit(batch)
+        if any(current):
+            self.activatePrevious()
+
+    def queueClear(self, batch):
+        # the whole last generation goes with one delete of its group
+        if self.currentGroup is not None:
+            batch.delete([self.currentGroup])
+            for node in self.registry.removeGeneration(self.currentGroup):
+                self.mergedLayouts.pop(node, None)
+        else:
+            batch.delete([node for tile in self.generatedTiles for node in tile])
+        for tile in self.generatedTiles:
+            self.mergedLayouts.pop(tile[0], None)
+        self.registry.remove(tile[0] for tile in self.generatedTiles)
+        self.generatedTiles = []
+        self.tileNodes = {}
+        self.currentParams = None
+        self.instanceSource = None
+        self.currentGroup = None
 
     def updateValues(self, UI, *args):
         # other users / scripters will not know what to put in UI
@@ -116,29 +819,35 @@ class TileGenerator:
         # i could have made this function with all the variables
         # for time's sake I at least made them 2 separate classes
         # I didn't have enough time to make this as clean as possible
+        # the UI caches every value and refreshes it from the change callbacks, so nothing is queried here
 
-        tileIsSimple = cmd.radioButtonGrp(UI.selectorTileSize, q=True, sl=True)
-        gapsIsSimple = cmd.radioButtonGrp(UI.selectorGaps, q=True, sl=True)
-        heightIsSimple = cmd.radioButtonGrp(UI.selectorHeight, q=True, sl=True)
-        rotationIsSimple = cmd.radioButtonGrp(UI.selectorMaxRotation, q=True, sl=True)
+        tileIsSimple = UI.value(UI.selectorTileSize)
+        gapsIsSimple = UI.value(UI.selectorGaps)
+        heightIsSimple = UI.value(UI.selectorHeight)
+        rotationIsSimple = UI.value(UI.selectorMaxRotation)
 
-        self.clear = cmd.checkBox(UI.clearScene, q=True, v=True)
+        self.clear = UI.value(UI.clearScene)
+        self.outputMode = OUTPUT_MODES[UI.value(UI.selectorOutput) - 1]
 
-        self.keepSizeX = cmd.checkBoxGrp(UI.reGenSettings, q=True, v2=True)
-        self.keepSizeY = cmd.checkBoxGrp(UI.reGenSettings, q=True, v3=True)
-        self.keepSizeZ = cmd.checkBoxGrp(UI.reGenSettings, q=True, v4=True)
+        self.keepSizeX = UI.value(UI.reGenSettings)[1]
+        self.keepSizeY = UI.value(UI.reGenSettings)[2]
+        self.keepSizeZ = UI.value(UI.reGenSettings)[3]
 
-        self.keepHeight = cmd.checkBoxGrp(UI.reGenSettings2, q=True, v1=True)
-        self.keepRotX = cmd.checkBoxGrp(UI.reGenSettings2, q=True, v2=True)
-        self.keepRotY = cmd.checkBoxGrp(UI.reGenSettings2, q=True, v3=True)
-        self.keepRotZ = cmd.checkBoxGrp(UI.reGenSettings2, q=True, v4=True)
+        self.keepHeight = UI.value(UI.reGenSettings2)[0]
+        self.keepRotX = UI.value(UI.reGenSettings2)[1]
+        self.keepRotY = UI.value(UI.reGenSettings2)[2]
+        self.keepRotZ = UI.value(UI.reGenSettings2)[3]
 
-        temp = cmd.intFieldGrp(UI.tiles, q=True, v=True)
+        temp = UI.value(UI.tiles)
         self.tileX = temp[0]
         self.tileY = temp[1]
+        self.seed = UI.value(UI.seedField)[0]
+        self.layoutProcesses = UI.value(UI.processesField)[0]
+        self.layoutCache.resize(max(0, UI.value(UI.cacheField)[0]) * 1024 ** 2)
+        self.resolveOverlaps = UI.value(UI.resolveToggle)
 
         if tileIsSimple == 1:  # if option 1 was chosen
-            temp = cmd.floatFieldGrp(UI.tileSize, q=True, v=True)
+            temp = UI.value(UI.tileSize)
             self.tileSizeXMax = temp[0]
             self.tileSizeXMin = temp[0]  # should be no variation since simple was chosen in the radio button
             self.tileSizeYMax = temp[1]
@@ -147,40 +856,40 @@ class TileGenerator:
             self.tileSizeZMin = temp[2]
 
         elif tileIsSimple == 2:  # if option 2 was chosen
-            tempMin = cmd.floatFieldGrp(UI.tileSizeMin, q=True, v=True)
-            tempMax = cmd.floatFieldGrp(UI.tileSizeMax, q=True, v=True)
+            tempMin = UI.value(UI.tileSizeMin)
+            tempMax = UI.value(UI.tileSizeMax)
             self.tileSizeXMax = tempMax[0]  # godmode aka min/max has been chosen, so the values get updated
             self.tileSizeXMin = tempMin[0]
             self.tileSizeYMax = tempMax[1]
             self.tileSizeYMin = tempMin[1]
 
         if gapsIsSimple == 1:
-            temp = cmd.floatFieldGrp(UI.gaps, q=True, v=True)
+            temp = UI.value(UI.gaps)
             self.gapXmax = temp[0]  # simple mode, if min and max are the same the result = min or max
             self.gapXmin = temp[0]
             self.gapYmax = temp[1]
             self.gapYmin = temp[1]
 
         elif gapsIsSimple == 2:
-            tempMin = cmd.floatFieldGrp(UI.gapsMin, q=True, v=True)
-            tempMax = cmd.floatFieldGrp(UI.gapsMax, q=True, v=True)
+            tempMin = UI.value(UI.gapsMin)
+            tempMax = UI.value(UI.gapsMax)
             self.gapXmax = tempMax[0]  # complex, required 2 values to get the min and max
             self.gapXmin = tempMin[0]
             self.gapYmax = tempMax[1]
             self.gapYmin = tempMin[1]
 
         if heightIsSimple == 1:
-            temp = cmd.floatFieldGrp(UI.heightVariation, q=True, v=True)
+            temp = UI.value(UI.heightVariation)
             self.heightVariationMax = temp[0]
             self.heightVariationMin = 0  # variation in height starting from 0
 
         elif heightIsSimple == 2:
-            temp = cmd.floatFieldGrp(UI.heightVariationMinMax, q=True, v=True)
+            temp = UI.value(UI.heightVariationMinMax)
             self.heightVariationMin = temp[0]
             self.heightVariationMax = temp[1]
 
         if rotationIsSimple == 1:
-            temp = cmd.floatFieldGrp(UI.maxRotation, q=True, v=True)
+            temp = UI.value(UI.maxRotation)
             self.rotationXMax = temp[0]
             self.rotationXMin = 0
             self.rotationYMax = temp[1]
@@ -189,8 +898,8 @@ class TileGenerator:
             self.rotationZMin = 0
 
         elif rotationIsSimple == 2:
-            tempMin = cmd.floatFieldGrp(UI.rotationMin, q=True, v=True)
-            tempMax = cmd.floatFieldGrp(UI.rotationMax, q=True, v=True)
+            tempMin = UI.value(UI.rotationMin)
+            tempMax = UI.value(UI.rotationMax)
             self.rotationXMax = tempMax[0]
             self.rotationXMin = tempMin[0]
             self.rotationYMax = tempMax[1]
@@ -198,45 +907,137 @@ class TileGenerator:
             self.rotationZMax = tempMax[2]
             self.rotationZMin = tempMin[2]
 
-        print("updated all values")
-
+    @tp.profiled("reGenerate")
     def reGenerate(self, UI, *args):
-        selected = cmd.ls(selection=True)
-        self.updateValues(UI)
-
-        for item in selected:
-            cubeAttr = cmd.listConnections(cmd.listRelatives(item))
-
-            heightOffset = r.uniform(self.heightVariationMin, self.heightVariationMax)
-            rotX = r.uniform(self.rotationXMin, self.rotationXMax)
-            rotY = r.uniform(self.rotationYMin, self.rotationYMax)
-            rotZ = r.uniform(self.rotationZMin, self.rotationZMax)
-            sizeX = r.uniform(self.tileSizeXMin, self.tileSizeXMax)
-            sizeY = r.uniform(self.tileSizeYMin, self.tileSizeYMax)
-            sizeZ = r.uniform(self.tileSizeZMin, self.tileSizeZMax)
-
-            if not self.keepSizeX:
-                cmd.setAttr("{cube}.width".format(cube=cubeAttr[1]), sizeX)
-            if not self.keepSizeY:
-                cmd.setAttr("{cube}.height".format(cube=cubeAttr[1]), sizeY)
-            if not self.keepSizeZ:
-                cmd.setAttr("{cube}.depth".format(cube=cubeAttr[1]), sizeZ)
-            if not self.keepHeight:
-                cmd.setAttr("{cube}.translateY".format(cube=item), heightOffset)
-            if not self.keepRotX:
-                cmd.setAttr("{cube}.rotateX".format(cube=item), rotX+90)
-            if not self.keepRotY:
-                cmd.setAttr("{cube}.rotateY".format(cube=item), rotY+90)
-            if not self.keepRotZ:
-                cmd.setAttr("{cube}.rotateZ".format(cube=item), rotZ)
+        with self.profiler.phase("updateValues"):
+            self.updateValues(UI)
+        self.reGenerateSelection()
+
+    @tp.profiled("reGenerate")
+    def reGenerateSelection(self):
+        # re-generates the selected tiles with the current values, without touching the UI
+        scene = self.backend.cmds
+        selected = scene.ls(selection=True)
+
+        # new values are written with one xform per tile (and one edit per polyCube) and committed as one batch
+        # (a single undo)
+        batch = tc.SceneBatch("reGenerate")
+        self.reGenerations += 1
+
+        # faces (or the whole object) of a merged mesh are handled per tile
+        mergedItems = [item for item in selected if item.split(".")[0] in self.mergedLayouts]
+        if mergedItems:
+            self.queueReGenerateMerged(batch, mergedItems)
+            selected = [item for item in selected if item not in mergedItems]
+
+        # registered tiles come straight from the registry, other objects are looked up once
+        # and skipped when they are not a polyCube
+        with self.profiler.phase("lookup"):
+            tiles, others = self.registry.lookup(selected)
+            tiles = self.resolveSizeNodes(tiles)
+            tiles.extend(self.lookupForeignTiles(others))
+            skipped = len(selected) - len(tiles)
+            columns = tr.recordColumns(tiles)
+        self.profiler.count("tiles", len(tiles))
+
+        # values come from the seed of each tile's generation, the tile index and the re-gen pass,
+        # kept attributes are not even sampled
+        with self.profiler.phase("sampling"):
+            samples = tl.sampleTiles(columns["seeds"], columns["i"], columns["j"], self.layoutParams(),
+                                     self.reGenerations, self.keptAttributes())
+
+        transforms = np.array(columns["transforms"], dtype=object)
+        sizeNodes = np.array(columns["sizeNodes"], dtype=object)
+        # same attributes as generate writes, so a re-generated tile looks like a generated one in every output mode
+        instanced = columns["instanced"]
+        if instanced.any():
+            # instances share one cube, so the size is applied as scale on the tile itself
+            batch.setTransformAttrs(transforms[instanced].tolist(), {INSTANCE_ATTRIBUTES[name][1]: values[instanced]
+                                                                     for name, values in samples.items()})
+        cubes = ~instanced
+        sizes = {CUBE_ATTRIBUTES[name][1]: values[cubes] for name, values in samples.items()
+                 if CUBE_ATTRIBUTES[name][0] == 1}
+        attrs = {CUBE_ATTRIBUTES[name][1]: values[cubes] for name, values in samples.items()
+                 if CUBE_ATTRIBUTES[name][0] == 0}
+        if cubes.any() and sizes:
+            batch.setCubeSizes(sizeNodes[cubes].tolist(), sizes)
+        if cubes.any() and attrs:
+            batch.setTransformAttrs(transforms[cubes].tolist(), attrs)
+
+        if skipped:
+            print("skipped {count} selected object(s) that are not tiles".format(count=skipped))
+        self.backend.commit(batch)
 
         print("finished re-generating values for the cubes")
 
+    def resolveSizeNodes(self, tiles):
+        # tiles restored from the scene only know their transform, the polyCube is looked up on first use
+        scene = self.backend.cmds
+        resolved = []
+        for tile in tiles:
+            if tile[4] is None:
+                shapes = scene.listRelatives(tile[0], shapes=True)
+                history = scene.listConnections(shapes[0], type="polyCube") if shapes else None
+                if not history:
+                    continue
+                self.registry.setSizeNode(tile[0], history[0])
+                tile = tile[:4] + (history[0],) + tile[5:]
+            resolved.append(tile)
+        return resolved
+
+    def lookupForeignTiles(self, items):
+        # polyCubes that are not in the registry (e.g. generated in an earlier session) get a stable index
+        # from their name, other objects and components are skipped
+        scene = self.backend.cmds
+        tiles = []
+        for item in items:
+            if "." in item:
+                continue
+            shapes = scene.listRelatives(item, shapes=True)
+            history = scene.listConnections(shapes[0], type="polyCube") if shapes else None
+            if not history:
+                continue
+            instanced = len(scene.listRelatives(shapes[0], allParents=True) or []) > 1
+            tiles.append((item, zlib.crc32(item.encode()), tl.FOREIGN_COLUMN, self.layoutSeed,
+                          item if instanced else history[0], instanced))
+        return tiles
+
+    def queueReGenerateMerged(self, batch, items):
+        # the faces of a merged mesh are in tile order, see tm.tileOfFace
+        scene = self.backend.cmds
+        faces = scene.filterExpand(scene.polyListComponentConversion(items, toFace=True), selectionMask=34) or []
+        tilesPerMesh = {}
+        for face in faces:
+            transform = face.split(".")[0]
+            faceIndex = int(face[face.rindex("[") + 1:-1])
+            tilesPerMesh.setdefault(transform, set()).add(tm.tileOfFace(faceIndex))
+
+        keep = self.keptAttributes()
+        for transform, tiles in tilesPerMesh.items():
+            layout = self.mergedLayouts[transform]
+            tiles = tl.resampleTiles(layout, self.layoutParams(), sorted(tiles), keep, self.reGenerations)
+
+            # only the points of the re-generated tiles get rewritten
+            points = tm.tilePoints(layout.sizes[tiles], layout.positions[tiles], layout.rotations[tiles])
+            indices = (tiles[:, None] * tm.POINTS_PER_TILE + np.arange(tm.POINTS_PER_TILE)).reshape(-1)
+            batch.setPoints(transform, indices, points.reshape(-1, 3))
+
+    def keptAttributes(self):
+        # names of the tile attributes that should not be re-generated
+        flags = {"sizeX": self.keepSizeX, "sizeY": self.keepSizeY, "sizeZ": self.keepSizeZ,
+                 "height": self.keepHeight, "rotX": self.keepRotX, "rotY": self.keepRotY, "rotZ": self.keepRotZ}
+        return {name for name, keep in flags.items() if keep}
+
 
 class UI:
     def __init__(self, id):
         self.generator = TileGenerator()
 
+        self.values = {}  # control -> cached value, refreshed by the change callback of the control
+        self.queries = {}  # control -> function that queries its value
+        self.previewRequest = 0  # only the last of several quick changes updates the preview
+        self.previewTimer = None
+
         # check if window already exists
         if cmd.window('window1', ex=True):
             cmd.deleteUI('window1', window=True)
@@ -253,6 +1054,17 @@ class UI:
         self.tiles = cmd.intFieldGrp(numberOfFields=2, value1=self.generator.tileX, value2=self.generator.tileY,
                                      label="tiles in X / Y direction",
                                      cal=(1, "left"))
+        self.seedField = cmd.intFieldGrp(numberOfFields=1, value1=self.generator.seed, label="seed",
+                                         cal=(1, "left"), ann="0 picks a new random seed on every generate, "
+                                                              "the same seed always gives the same tiles")
+        self.processesField = cmd.intFieldGrp(numberOfFields=1, value1=self.generator.layoutProcesses,
+                                              label="layout processes", cal=(1, "left"),
+                                              ann="processes computing the layout of big grids, "
+                                                  "1 computes it inside Maya, 0 uses every core")
+        self.cacheField = cmd.intFieldGrp(numberOfFields=1, value1=self.generator.layoutCache.budget // 1024 ** 2,
+                                          label="layout cache MB", cal=(1, "left"),
+                                          ann="memory for the layouts of earlier values, going back to them "
+                                              "skips the sampling, 0 turns the cache off")
 
         cmd.separator(h=5)
         cmd.separator(h=5)  # double separator line
@@ -353,7 +1165,7 @@ class UI:
         self.clearScene = cmd.checkBox(l="clear cubes on generate", v=self.generator.clear)
         cmd.separator(h=5, style="none", w=10)  # indentation
         self.reGenSettings = cmd.checkBoxGrp(vr=True, ncb=4,
-                                             la4=["to not ReGen", "tile width", "tile height", "tile depth"], en1=False,
+                                             la4=["to not ReGen", "tile width", "tile depth", "tile height"], en1=False,
                                              w=100, v1=True, co2=(250, 120),
                                              ann="boxes that are checked will not be regenerated")
         self.reGenSettings2 = cmd.checkBoxGrp(vr=True, ncb=4,
@@ -363,6 +1175,22 @@ class UI:
         cmd.setParent("..")  # back to default columns
         cmd.separator(h=5, style="none")  # small offset
 
+        # output mode (radiobutton)
+        self.selectorOutput = cmd.radioButtonGrp(label="output", label1="Separate cubes", label2="Instanced",
+                                                 label3="Merged mesh", sl=1, nrb=3, cal=(1, "left"), h=30,
+                                                 ann="instanced shares one cube between all tiles, merged mesh builds all tiles into a single mesh, "
+                                                     "select faces of a tile to re-generate it")
+        self.resolveToggle = cmd.checkBox(l="resolve overlapping tiles", v=self.generator.resolveOverlaps,
+                                          ann="reduces the rotation, nudges the height or re-samples tiles that "
+                                              "overlap a neighbour, within the min / max values")
+        self.profileToggle = cmd.checkBox(l="print timings", v=self.generator.profiler.enabled,
+                                          ann="prints the time of every phase and the maya commands used "
+                                              "after each generate, re-gen and clear")
+        self.previewToggle = cmd.checkBox(l="live preview", v=False,
+                                          ann="shows a proxy of the tiles while editing the values, "
+                                              "Generate turns the preview into real tiles")
+        cmd.separator(h=5, style="none")  # small offset
+
         cmd.rowLayout(nc=5)
         cmd.separator(h=5, w=space / 2, style="none")
         cmd.button(label="Generate", command=self.generate, w=space)
@@ -375,17 +1203,126 @@ class UI:
         cmd.rowLayout(nc=2)
         cmd.separator(h=5, style="none", w=space / 2)
         cmd.button(label="clear last generated tiles", c=self.generator.clearTiles, w=2.55 * space)
+        cmd.setParent("..")
+        cmd.rowLayout(nc=2)
+        cmd.separator(h=5, style="none", w=space / 2)
+        cmd.button(label="clear selected generations", c=self.generator.clearSelectedGenerations, w=2.55 * space)
+        cmd.setParent("..")
+        cmd.separator(h=10, style="none")
+
+        # layout cache
+        self.cacheStats = cmd.text(label=str(self.generator.layoutCache), al="left")
+        cmd.rowLayout(nc=2)
+        cmd.separator(h=5, style="none", w=space / 2)
+        cmd.button(label="clear layout cache", c=self.clearCache, w=2.55 * space)
+        cmd.setParent("..")
+        cmd.separator(h=10, style="none")
+
+        # layout files
+        self.replayRows = cmd.intFieldGrp(numberOfFields=2, value1=0, value2=0, label="replay rows from / to",
+                                          cal=(1, "left"), ann="rows of the layout file to replay, 0 / 0 replays all")
+        cmd.rowLayout(nc=3)
+        cmd.separator(h=5, style="none", w=space / 2)
+        cmd.button(label="export layout", c=self.exportLayout, w=1.25 * space)
+        cmd.button(label="replay layout", c=self.replayLayout, w=1.25 * space)
 
         cmd.setParent("..")
         cmd.separator(h=10, style="none")
 
+        self.watchControls()
+        # the generator re-reads the scene after every undo / redo, the jobs go with the window
+        for event in ("Undo", "Redo"):
+            cmd.scriptJob(event=(event, self.generator.syncWithScene), parent=MainWindow)
         cmd.showWindow(MainWindow)
 
+    def watchControls(self):
+        # every input is queried once here, after that only the control that changed is queried again
+        for control in (self.tileSize, self.tileSizeMin, self.tileSizeMax, self.gaps, self.gapsMin, self.gapsMax,
+                        self.maxRotation, self.rotationMin, self.rotationMax, self.heightVariation,
+                        self.heightVariationMinMax):
+            self.watch(control, cmd.floatFieldGrp, "v", dragCommand=True)
+        for control in (self.tiles, self.seedField, self.processesField, self.cacheField):
+            self.watch(control, cmd.intFieldGrp, "v", dragCommand=True)
+        for control in (self.selectorTileSize, self.selectorGaps, self.selectorHeight, self.selectorMaxRotation,
+                        self.selectorOutput):
+            self.watch(control, cmd.radioButtonGrp, "sl")
+        for control in (self.clearScene, self.resolveToggle, self.profileToggle, self.previewToggle):
+            self.watch(control, cmd.checkBox, "v")
+        for control in (self.reGenSettings, self.reGenSettings2):
+            self.watch(control, cmd.checkBoxGrp, "va4")
+
+    def watch(self, control, command, flag, dragCommand=False):
+        self.queries[control] = func.partial(command, control, q=True, **{flag: True})
+        self.values[control] = self.queries[control]()
+        callbacks = {"cc": func.partial(self.valueChanged, control)}
+        if dragCommand:
+            callbacks["dc"] = callbacks["cc"]  # ctrl + middle mouse drag in a field
+        command(control, e=True, **callbacks)
+
+    def value(self, control):
+        return self.values[control]
+
+    def valueChanged(self, control, *args):
+        self.values[control] = self.queries[control]()
+        if control == self.profileToggle:
+            profiler = self.generator.profiler
+            profiler.enabled = profiler.log = profiler.countCommands = self.values[control]
+        elif control == self.previewToggle and not self.values[control]:
+            self.generator.removePreview()
+        elif self.values[self.previewToggle]:
+            self.schedulePreview()
+
+    def schedulePreview(self):
+        # debounced: the preview is updated once the values stopped changing for PREVIEW_DELAY seconds,
+        # the update itself runs in Maya's main thread when it is idle
+        import maya.utils
+        self.cancelPreview()
+        self.previewTimer = threading.Timer(PREVIEW_DELAY, maya.utils.executeDeferred,
+                                            (self.updatePreview, self.previewRequest))
+        self.previewTimer.daemon = True
+        self.previewTimer.start()
+
+    def cancelPreview(self):
+        # drops a pending preview update, also one that already waits for Maya to be idle
+        self.previewRequest += 1
+        if self.previewTimer is not None:
+            self.previewTimer.cancel()
+            self.previewTimer = None
+
+    def updatePreview(self, request):
+        if request != self.previewRequest or not self.values[self.previewToggle]:
+            return  # a newer change is on its way, or the preview was turned off in the meantime
+        self.generator.updateValues(self)
+        self.generator.previewTiles()
+        self.updateCacheStats()
+
+    def updateCacheStats(self):
+        cmd.text(self.cacheStats, e=True, label=str(self.generator.layoutCache))
+
+    def clearCache(self, *args):
+        self.generator.layoutCache.clear()
+        self.updateCacheStats()
+
+    def exportLayout(self, *args):
+        path = cmd.fileDialog2(fileFilter=LAYOUT_FILE_FILTER, dialogStyle=2, fileMode=0)
+        if path:
+            self.generator.exportLayout(path[0])
+
+    def replayLayout(self, *args):
+        path = cmd.fileDialog2(fileFilter=LAYOUT_FILE_FILTER, dialogStyle=2, fileMode=1)
+        if not path:
+            return
+        rowStart, rowStop = cmd.intFieldGrp(self.replayRows, q=True, v=True)
+        self.generator.updateValues(self)
+        self.generator.replayLayout(path[0], rowStart, rowStop or None)
+
     def reGenerate(self, *args):
         self.generator.reGenerate(self)
 
     def generate(self, *args):
+        self.cancelPreview()  # Generate uses the current values, a preview of older ones must not follow it
         self.generator.generateTiles(self)
+        self.updateCacheStats()
 
     @staticmethod
     def turnOff(group, group2, *args):
@@ -425,4 +1362,6 @@ lit = u"\U0001F525"
 logo = u"\u24B8"
 windowName = "Tile generator  " + logo + "BB" + lit + em
 
-win = UI(windowName)
+# only open the window when the script is run directly, importing it (e.g. for the benchmarks) stays headless
+if __name__ == "__main__":
+    win = UI(windowName)
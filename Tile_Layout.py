@@ -0,0 +1,346 @@
+# headless layout engine for the Tile Generator
+# computes the whole grid in one go with NumPy, no Maya session required
+import concurrent.futures
+import multiprocessing
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+class LayoutParams:
+    # every value that influences the layout, same names as on TileGenerator
+    FIELDS = ("tileX", "tileY",
+              "tileSizeXMin", "tileSizeXMax", "tileSizeYMin", "tileSizeYMax", "tileSizeZMin", "tileSizeZMax",
+              "gapXmin", "gapXmax", "gapYmin", "gapYmax",
+              "heightVariationMin", "heightVariationMax",
+              "rotationXMin", "rotationXMax", "rotationYMin", "rotationYMax", "rotationZMin", "rotationZMax",
+              "seed")
+
+    def __init__(self, **values):
+        # defaults match the defaults of the TileGenerator
+        self.tileX = 10
+        self.tileY = 5
+
+        self.tileSizeXMin = 2.0
+        self.tileSizeXMax = 2.5
+        self.tileSizeYMin = 2
+        self.tileSizeYMax = 3
+        self.tileSizeZMin = .2
+        self.tileSizeZMax = 0.5
+
+        self.gapXmin = .23
+        self.gapXmax = .55
+        self.gapYmin = .2
+        self.gapYmax = .8
+
+        self.heightVariationMin = -.5
+        self.heightVariationMax = .2
+
+        self.rotationXMin = -8
+        self.rotationXMax = 5
+        self.rotationYMin = -10
+        self.rotationYMax = 8
+        self.rotationZMin = -10
+        self.rotationZMax = 15
+
+        self.seed = None  # None picks a new random seed for every layout
+
+        for name, value in values.items():
+            if name not in self.FIELDS:
+                raise TypeError("unknown layout parameter: {name}".format(name=name))
+            setattr(self, name, value)
+
+    def values(self):
+        # every parameter in a fixed order, e.g. to compare two parameter sets
+        return tuple(getattr(self, name) for name in self.FIELDS)
+
+    @classmethod
+    def fromObject(cls, source):
+        # copy the values from anything that has the same attribute names (e.g. a TileGenerator)
+        return cls(**{name: getattr(source, name) for name in cls.FIELDS})
+
+
+class TileLayout:
+    # all tiles of a grid (or a block of rows of it) as contiguous arrays
+    # tiles are stored in generation order: tile (i, j) is at row (i - rowStart) * tileY + j,
+    # unless the layout was taken out of another one, then indices holds the (i, j) of every tile
+    def __init__(self, tileX, tileY, sizes, positions, rotations, seed=None, rowStart=0, indices=None):
+        self.tileX = tileX  # rows (tiles in the X direction) in this layout
+        self.tileY = tileY
+        self.sizes = sizes  # (n, 3) sizeX, sizeY, sizeZ -> polyCube width, depth, height
+        self.positions = positions  # (n, 3) world position as passed to move
+        self.rotations = rotations  # (n, 3) rotation in degrees as passed to rotate
+        self.seed = seed
+        self.rowStart = rowStart
+        self.indices = indices
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def index(self, i, j):
+        return (i - self.rowStart) * self.tileY + j
+
+    def gridIndices(self):
+        # (n, 2) array with the (i, j) of every tile
+        if self.indices is not None:
+            return self.indices
+        i, j = np.divmod(np.arange(len(self)), self.tileY)
+        return np.stack((i + self.rowStart, j), axis=1)
+
+    def rows(self, rowStart, rowStop):
+        # the rows rowStart up to rowStop as a layout that shares the arrays of this one
+        start = self.index(rowStart, 0)
+        stop = self.index(rowStop, 0)
+        return TileLayout(rowStop - rowStart, self.tileY, self.sizes[start:stop], self.positions[start:stop],
+                          self.rotations[start:stop], self.seed, rowStart)
+
+    def copy(self):
+        # a layout with its own arrays, e.g. to change it without touching this one
+        return TileLayout(self.tileX, self.tileY, self.sizes.copy(), self.positions.copy(), self.rotations.copy(),
+                          self.seed, self.rowStart, None if self.indices is None else self.indices.copy())
+
+    def take(self, tiles):
+        # a layout with only the given tiles (indices or a boolean mask)
+        return TileLayout(self.tileX, self.tileY, self.sizes[tiles], self.positions[tiles], self.rotations[tiles],
+                          self.seed, self.rowStart, self.gridIndices()[tiles])
+
+
+# counter-based sampling: every value is a hash of (seed, attribute, variant, i, j),
+# so any tile, row or block can be recomputed on its own, in any order, with identical results
+STREAMS = {"sizeX": 1, "gapX": 2, "sizeY": 3, "sizeZ": 4, "gapY": 5, "height": 6, "rotX": 7, "rotY": 8, "rotZ": 9}
+
+GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+MIX2 = np.uint64(0x94D049BB133111EB)
+
+
+def mix64(x):
+    # splitmix64 finaliser, works on uint64 arrays (overflow wraps around on purpose)
+    x = np.asarray(x, dtype=np.uint64)
+    x = (x ^ (x >> np.uint64(30))) * MIX1
+    x = (x ^ (x >> np.uint64(27))) * MIX2
+    return x ^ (x >> np.uint64(31))
+
+
+FOREIGN_COLUMN = 0xFFFFFFFF  # j used for objects that were not generated as part of a grid
+
+
+MAX_SEED = 2 ** 31 - 1  # the seed field of the UI holds 32 bit ints, so printed seeds can be typed back in
+SEED_MASK = 2 ** 64 - 1
+
+
+def newSeed():
+    return int(np.random.default_rng().integers(1, MAX_SEED + 1))
+
+
+def seedBits(seed):
+    # seed (or seeds) as uint64 for the sampling, negative seeds (the UI and command line accept them) wrap around
+    if isinstance(seed, np.ndarray):
+        return seed.astype(np.uint64)
+    if np.ndim(seed):
+        return np.array([int(value) & SEED_MASK for value in seed], dtype=np.uint64)
+    return np.uint64(int(seed) & SEED_MASK)
+
+
+def uniformAt(seed, attribute, i, j, low, high, variant=0):
+    # value of one attribute for the tiles (i, j), seed, i and j can be arrays of any (matching) shape
+    with np.errstate(over="ignore"):
+        key = mix64(seedBits(seed) ^ mix64(np.uint64(STREAMS[attribute]) * GOLDEN + np.uint64(variant)))
+        counter = (np.asarray(i, dtype=np.uint64) << np.uint64(32)) | np.asarray(j, dtype=np.uint64)
+        bits = mix64(key ^ mix64(counter + GOLDEN))
+    # top 53 bits -> float in [0, 1)
+    return low + (high - low) * ((bits >> np.uint64(11)).astype(np.float64) * 2.0 ** -53)
+
+
+def computeLayout(params):
+    if params.seed is None:
+        params = LayoutParams.fromObject(params)
+        params.seed = newSeed()
+    return computeRows(params, 0, int(params.tileX))
+
+
+def computeRows(params, rowStart, rowStop):
+    # the tiles of rows (X direction) rowStart up to rowStop, identical to the same rows of the full layout
+    seed = params.seed
+    tileY = int(params.tileY)
+    rows = rowStop - rowStart
+    shape = (rows, tileY)
+    if rows <= 0 or tileY <= 0:
+        # an empty grid (e.g. 0 tiles in one direction) has no tiles, same as before the layout engine
+        return TileLayout(max(rows, 0), max(tileY, 0), np.empty((0, 3)), np.empty((0, 3)), np.empty((0, 3)),
+                          seed, rowStart)
+
+    # one value per column in the X direction, all earlier columns are needed for the running offset
+    columns = np.arange(rowStop)
+    sizeX = uniformAt(seed, "sizeX", columns, 0, params.tileSizeXMin, params.tileSizeXMax)
+    gapX = uniformAt(seed, "gapX", columns, 0, params.gapXmin, params.gapXmax)
+
+    # one value per tile
+    i, j = np.meshgrid(np.arange(rowStart, rowStop), np.arange(tileY), indexing="ij")
+    sizeY = uniformAt(seed, "sizeY", i, j, params.tileSizeYMin, params.tileSizeYMax)
+    sizeZ = uniformAt(seed, "sizeZ", i, j, params.tileSizeZMin, params.tileSizeZMax)
+    gapY = uniformAt(seed, "gapY", i, j, params.gapYmin, params.gapYmax)
+    gapY[:, 0] = 0  # no gap in front of the first tile of a row
+    heightOffset = uniformAt(seed, "height", i, j, params.heightVariationMin, params.heightVariationMax)
+    rotX = uniformAt(seed, "rotX", i, j, params.rotationXMin, params.rotationXMax)
+    rotY = uniformAt(seed, "rotY", i, j, params.rotationYMin, params.rotationYMax)
+    rotZ = uniformAt(seed, "rotZ", i, j, params.rotationZMin, params.rotationZMax)
+
+    # running offsets: the first tile moves half its size, every next tile its full size
+    # the gap in X is added for every column, the gap in Y from the second tile on
+    offsetX = (np.cumsum(sizeX) - sizeX[:1] / 2 + np.cumsum(gapX))[rowStart:]
+    offsetY = np.cumsum(sizeY, axis=1) - sizeY[:, :1] / 2 + np.cumsum(gapY, axis=1)
+
+    sizes = np.empty(shape + (3,))
+    sizes[..., 0] = sizeX[rowStart:, None]
+    sizes[..., 1] = sizeY
+    sizes[..., 2] = sizeZ
+
+    positions = np.empty(shape + (3,))
+    positions[..., 0] = offsetX[:, None]
+    positions[..., 1] = heightOffset
+    positions[..., 2] = offsetY
+
+    rotations = np.stack((rotX, rotY, rotZ), axis=-1)
+
+    return TileLayout(rows, tileY, sizes.reshape(-1, 3), positions.reshape(-1, 3), rotations.reshape(-1, 3),
+                      seed, rowStart)
+
+
+def rowBlocks(params, blockSize):
+    # (rowStart, rowStop) of consecutive blocks of whole rows with about blockSize tiles each
+    tileX = int(params.tileX)
+    rowsPerBlock = max(1, blockSize // max(1, int(params.tileY)))
+    return [(rowStart, min(rowStart + rowsPerBlock, tileX)) for rowStart in range(0, tileX, rowsPerBlock)]
+
+
+def iterRowBlocks(params, blockSize):
+    # the layout as consecutive blocks of whole rows with about blockSize tiles each
+    if params.seed is None:
+        params = LayoutParams.fromObject(params)
+        params.seed = newSeed()
+
+    for rowStart, rowStop in rowBlocks(params, blockSize):
+        yield computeRows(params, rowStart, rowStop)
+
+
+def joinRows(blocks):
+    # consecutive blocks of whole rows (e.g. streamed from a layout file) as one layout, None without blocks
+    blocks = list(blocks)
+    if not blocks:
+        return None
+    return TileLayout(sum(block.tileX for block in blocks), blocks[0].tileY,
+                      np.concatenate([block.sizes for block in blocks]),
+                      np.concatenate([block.positions for block in blocks]),
+                      np.concatenate([block.rotations for block in blocks]), blocks[0].seed, blocks[0].rowStart)
+
+
+def computeRowsInto(params, rowStart, rowStop, memoryNames):
+    # worker of computeLayoutParallel: writes the rows straight into the shared arrays of the whole grid
+    block = computeRows(params, rowStart, rowStop)
+    start = rowStart * block.tileY
+    for name, values in zip(memoryNames, (block.sizes, block.positions, block.rotations)):
+        memory = shared_memory.SharedMemory(name)
+        try:
+            np.ndarray((start + len(values), 3), buffer=memory.buf)[start:] = values
+        finally:
+            memory.close()
+
+
+def computeLayoutParallel(params, processes=None, blockSize=250000, executable=None):
+    # computeLayout spread over a process pool (all cores when processes is None), e.g. for big floors
+    # or batch runs on a farm machine
+    # every block is sampled from (seed, i, j) and sums up the sizes and gaps of all rows before it,
+    # so the result is identical to computeLayout no matter which process computed which rows
+    # executable is the python used for the worker processes, inside Maya that has to be mayapy
+    if params.seed is None:
+        params = LayoutParams.fromObject(params)
+        params.seed = newSeed()
+
+    blocks = rowBlocks(params, blockSize)
+    processes = min(processes or os.cpu_count() or 1, len(blocks))
+    if processes <= 1:
+        return computeLayout(params)
+
+    # the workers fill shared memory, so the arrays don't have to be sent back through a pipe
+    shape = (int(params.tileX) * int(params.tileY), 3)
+    memories = [shared_memory.SharedMemory(create=True, size=shape[0] * shape[1] * 8) for _ in range(3)]
+    try:
+        context = multiprocessing.get_context("spawn")
+        if executable is not None:
+            context.set_executable(executable)
+        names = [memory.name for memory in memories]
+        with concurrent.futures.ProcessPoolExecutor(processes, mp_context=context) as pool:
+            futures = [pool.submit(computeRowsInto, params, rowStart, rowStop, names) for rowStart, rowStop in blocks]
+            for future in concurrent.futures.as_completed(futures):
+                future.result()  # re-raises errors of the workers
+        sizes, positions, rotations = [np.ndarray(shape, buffer=memory.buf).copy() for memory in memories]
+    finally:
+        for memory in memories:
+            memory.close()
+            memory.unlink()
+
+    return TileLayout(int(params.tileX), int(params.tileY), sizes, positions, rotations, params.seed)
+
+
+# attributes that can be re-generated per tile, with the array and column they live in
+TILE_ATTRIBUTES = {"sizeX": ("sizes", 0), "sizeY": ("sizes", 1), "sizeZ": ("sizes", 2),
+                   "height": ("positions", 1),
+                   "rotX": ("rotations", 0), "rotY": ("rotations", 1), "rotZ": ("rotations", 2)}
+
+# min / max parameter of every attribute
+ATTRIBUTE_RANGES = {"sizeX": ("tileSizeXMin", "tileSizeXMax"), "sizeY": ("tileSizeYMin", "tileSizeYMax"),
+                    "sizeZ": ("tileSizeZMin", "tileSizeZMax"),
+                    "height": ("heightVariationMin", "heightVariationMax"),
+                    "rotX": ("rotationXMin", "rotationXMax"), "rotY": ("rotationYMin", "rotationYMax"),
+                    "rotZ": ("rotationZMin", "rotationZMax")}
+
+
+def sampleTiles(seed, i, j, params, variant, keep=()):
+    # new values of every attribute that is not kept, for the tiles (i, j)
+    values = {}
+    for name in TILE_ATTRIBUTES:
+        if name in keep:
+            continue
+        low, high = ATTRIBUTE_RANGES[name]
+        values[name] = uniformAt(seed, name, i, j, getattr(params, low), getattr(params, high), variant)
+    return values
+
+
+# every array column of a layout, the tile attributes plus the X / Y position that follow from sizes and gaps
+LAYOUT_COLUMNS = dict(TILE_ATTRIBUTES, positionX=("positions", 0), positionZ=("positions", 2))
+
+# layout columns that depend on each parameter
+PARAMETER_COLUMNS = {"tileSizeXMin": ("sizeX", "positionX"), "tileSizeXMax": ("sizeX", "positionX"),
+                     "tileSizeYMin": ("sizeY", "positionZ"), "tileSizeYMax": ("sizeY", "positionZ"),
+                     "tileSizeZMin": ("sizeZ",), "tileSizeZMax": ("sizeZ",),
+                     "gapXmin": ("positionX",), "gapXmax": ("positionX",),
+                     "gapYmin": ("positionZ",), "gapYmax": ("positionZ",),
+                     "heightVariationMin": ("height",), "heightVariationMax": ("height",),
+                     "rotationXMin": ("rotX",), "rotationXMax": ("rotX",),
+                     "rotationYMin": ("rotY",), "rotationYMax": ("rotY",),
+                     "rotationZMin": ("rotZ",), "rotationZMax": ("rotZ",)}
+
+
+def changedColumns(old, new):
+    # layout columns whose values differ between two parameter sets
+    # tiles that exist in both grids keep their values when only the tile count changes
+    if old.seed != new.seed:
+        return set(LAYOUT_COLUMNS)
+    columns = set()
+    for name, affected in PARAMETER_COLUMNS.items():
+        if getattr(old, name) != getattr(new, name):
+            columns.update(affected)
+    return columns
+
+
+def resampleTiles(layout, params, tiles, keep=(), variant=1):
+    # draws new values for the given tiles in place, attributes named in keep stay as they are
+    # variant 0 are the values of the layout itself, every re-generation uses the next variant
+    tiles = np.asarray(tiles, dtype=np.intp)
+    i, j = layout.gridIndices()[tiles].T
+    for name, values in sampleTiles(layout.seed, i, j, params, variant, keep).items():
+        array, column = TILE_ATTRIBUTES[name]
+        getattr(layout, array)[tiles, column] = values
+    return tiles
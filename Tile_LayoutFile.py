@@ -0,0 +1,97 @@
+# compact binary file for a tile layout, usable without Maya
+# a layout computed on a farm (or exported from a scene) loads by memory mapping, so opening a
+# million tile file reads nothing but the header and any window of rows can be replayed into a scene
+#
+#   magic (8 bytes) | version (uint32) | header size (uint32) | JSON header | tile records
+#
+# the JSON header holds the parameters (incl. seed) and the tile count, it is padded so the records
+# start at a multiple of 64 bytes, the records are stored in generation order (tile (i, j) at i * tileY + j)
+import json
+import struct
+
+import numpy as np
+
+import Tile_Layout as tl
+
+MAGIC = b"TILELAYT"
+FORMAT_VERSION = 1
+PREFIX = struct.Struct("<8sII")
+ALIGNMENT = 64
+
+# one record per tile, little endian, float64 so a replay gives exactly the generated values
+TILE_DTYPE = np.dtype([("index", "<i4", (2,)), ("size", "<f8", (3,)), ("position", "<f8", (3,)),
+                       ("rotation", "<f8", (3,))])
+
+
+def tileRecords(layout):
+    # a layout (or block of one) as structured records
+    records = np.empty(len(layout), dtype=TILE_DTYPE)
+    records["index"] = layout.gridIndices()
+    records["size"] = layout.sizes
+    records["position"] = layout.positions
+    records["rotation"] = layout.rotations
+    return records
+
+
+def saveLayout(path, params, blocks, resolved=False):
+    # writes the full grid of params, blocks are consecutive row blocks (e.g. from tl.iterRowBlocks),
+    # so the whole layout never has to be in memory, resolved tells overlaps were resolved after the layout
+    if params.seed is None:
+        raise ValueError("a layout can only be saved with its seed")
+    count = int(params.tileX) * int(params.tileY)
+    header = json.dumps({"params": dict(zip(params.FIELDS, params.values())), "count": count,
+                         "resolveOverlaps": resolved, "dtype": TILE_DTYPE.descr}).encode()
+    header += b" " * (-(PREFIX.size + len(header)) % ALIGNMENT)
+
+    written = 0
+    with open(path, "wb") as output:
+        output.write(PREFIX.pack(MAGIC, FORMAT_VERSION, len(header)))
+        output.write(header)
+        for block in blocks:
+            if block.rowStart * int(params.tileY) != written:
+                raise ValueError("row blocks have to be saved in order")
+            tileRecords(block).tofile(output)
+            written += len(block)
+    if written != count:
+        raise ValueError("saved {written} of {count} tiles".format(written=written, count=count))
+
+
+class LayoutFile:
+    # a saved layout, the tile records are memory mapped and only read when a window of them is used
+    def __init__(self, path):
+        with open(path, "rb") as source:
+            magic, version, headerSize = PREFIX.unpack(source.read(PREFIX.size))
+            if magic != MAGIC:
+                raise ValueError("{path} is not a tile layout file".format(path=path))
+            if version != FORMAT_VERSION:
+                raise ValueError("{path} has layout format version {version}, expected {expected}".format(
+                    path=path, version=version, expected=FORMAT_VERSION))
+            header = json.loads(source.read(headerSize))
+
+        self.path = path
+        self.params = tl.LayoutParams(**header["params"])
+        self.tileX = int(self.params.tileX)
+        self.tileY = int(self.params.tileY)
+        self.resolved = header.get("resolveOverlaps", False)
+        self.tiles = np.empty(0, dtype=TILE_DTYPE)  # an empty file region can't be mapped
+        if header["count"]:
+            self.tiles = np.memmap(path, dtype=TILE_DTYPE, mode="r", offset=PREFIX.size + headerSize,
+                                   shape=(header["count"],))
+
+    def __len__(self):
+        return len(self.tiles)
+
+    def rows(self, rowStart=0, rowStop=None):
+        # rows rowStart up to rowStop as a layout, only these records are read from the file
+        rowStop = self.tileX if rowStop is None else min(rowStop, self.tileX)
+        records = self.tiles[rowStart * self.tileY:rowStop * self.tileY]
+        return tl.TileLayout(rowStop - rowStart, self.tileY, np.array(records["size"]),
+                             np.array(records["position"]), np.array(records["rotation"]), self.params.seed,
+                             rowStart)
+
+    def iterRowBlocks(self, blockSize, rowStart=0, rowStop=None):
+        # the window rowStart up to rowStop in blocks of whole rows with about blockSize tiles each
+        rowStop = self.tileX if rowStop is None else min(rowStop, self.tileX)
+        rowsPerBlock = max(1, blockSize // max(1, self.tileY))
+        for start in range(rowStart, rowStop, rowsPerBlock):
+            yield self.rows(start, min(start + rowsPerBlock, rowStop))
@@ -0,0 +1,64 @@
+# vertex / index buffers for a tile layout, usable without Maya
+# every tile becomes a box with the same vertex and face order as a Maya polyCube
+import numpy as np
+
+# corners of a unit polyCube
+CUBE_POINTS = np.array([[-.5, -.5, .5], [.5, -.5, .5], [-.5, .5, .5], [.5, .5, .5],
+                        [-.5, .5, -.5], [.5, .5, -.5], [-.5, -.5, -.5], [.5, -.5, -.5]])
+# faces of a unit polyCube, 4 vertices each
+CUBE_FACES = np.array([[0, 1, 3, 2], [2, 3, 5, 4], [4, 5, 7, 6], [6, 7, 1, 0], [1, 7, 5, 3], [6, 0, 2, 4]])
+
+POINTS_PER_TILE = len(CUBE_POINTS)
+FACES_PER_TILE = len(CUBE_FACES)
+
+
+class MeshBuffers:
+    # one mesh holding all tiles, tile n owns points n * POINTS_PER_TILE up to (n + 1) * POINTS_PER_TILE
+    # and faces n * FACES_PER_TILE up to (n + 1) * FACES_PER_TILE, so no per-face tile id is stored on the mesh
+    def __init__(self, points, faceCounts, faceConnects):
+        self.points = points  # (n * 8, 3)
+        self.faceCounts = faceCounts  # (n * 6,) vertices per face
+        self.faceConnects = faceConnects  # (n * 24,) vertex indices of all faces
+
+
+def tileOfFace(face):
+    # tile (in layout order) a face of a merged mesh belongs to, works on arrays too
+    return face // FACES_PER_TILE
+
+
+def rotationMatrices(rotations):
+    # (n, 3) rotations in degrees -> (n, 3, 3) matrices, default Maya rotate order (xyz)
+    rx, ry, rz = np.radians(rotations).T
+    cx, cy, cz = np.cos(rx), np.cos(ry), np.cos(rz)
+    sx, sy, sz = np.sin(rx), np.sin(ry), np.sin(rz)
+
+    matrices = np.empty((len(rotations), 3, 3))
+    matrices[:, 0, 0] = cy * cz
+    matrices[:, 0, 1] = sx * sy * cz - cx * sz
+    matrices[:, 0, 2] = cx * sy * cz + sx * sz
+    matrices[:, 1, 0] = cy * sz
+    matrices[:, 1, 1] = sx * sy * sz + cx * cz
+    matrices[:, 1, 2] = cx * sy * sz - sx * cz
+    matrices[:, 2, 0] = -sy
+    matrices[:, 2, 1] = sx * cy
+    matrices[:, 2, 2] = cx * cy
+    return matrices
+
+
+def tilePoints(sizes, positions, rotations):
+    # (n, 8, 3) world space corners of every tile
+    # sizeX is the width (X), sizeY the depth (Z) and sizeZ the height (Y), same as the polyCube call
+    scale = sizes[:, [0, 2, 1]]
+    local = CUBE_POINTS[None, :, :] * scale[:, None, :]
+    return np.einsum("nij,nkj->nki", rotationMatrices(rotations), local) + positions[:, None, :]
+
+
+def buildMeshBuffers(layout):
+    count = len(layout)
+    points = tilePoints(layout.sizes, layout.positions, layout.rotations).reshape(-1, 3)
+
+    faceCounts = np.full(count * FACES_PER_TILE, CUBE_FACES.shape[1], dtype=np.int32)
+    offsets = np.arange(count, dtype=np.int32) * POINTS_PER_TILE
+    faceConnects = (CUBE_FACES[None, :, :] + offsets[:, None, None]).astype(np.int32).reshape(-1)
+
+    return MeshBuffers(points, faceCounts, faceConnects)
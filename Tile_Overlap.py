@@ -0,0 +1,268 @@
+# overlap detection and resolution for a tile layout, usable without Maya
+# tiles are oriented boxes, candidate pairs come from a uniform spatial hash on the floor (X / Z),
+# so only tiles in neighbouring cells are tested and the cost grows linearly with the tile count
+import numpy as np
+
+import Tile_Layout as tl
+import Tile_Mesh as tm
+
+# half of every cell pair is enough to see each pair of neighbouring cells once
+NEIGHBOUR_CELLS = ((0, 0), (0, 1), (1, -1), (1, 0), (1, 1))
+
+RESOLVE_VARIANT = 1 << 20  # re-sampled values stay clear of the variants Re-Gen Selection uses
+SIZES = ("sizeX", "sizeY", "sizeZ")  # never changed while resolving, bigger tiles would only overlap more
+SNAP = 1e-3  # degrees, a rotation this close to its target is set to the target
+TOLERANCE = 1e-9  # touching tiles don't overlap
+PARALLEL = 1e-6  # cross products of edges shorter than this are not tested as separating axis
+
+
+class OverlapReport:
+    def __init__(self, found, fixed, remaining, passes):
+        self.found = found  # overlapping pairs before resolving
+        self.fixed = fixed  # of those, pairs that don't overlap anymore
+        self.remaining = remaining  # overlapping pairs after resolving (including new ones, if any)
+        self.passes = passes
+
+    def __str__(self):
+        return "{found} overlapping tile pairs found, {fixed} fixed, {remaining} remaining after {passes} passes".format(
+            found=self.found, fixed=self.fixed, remaining=self.remaining, passes=self.passes)
+
+
+def maxRadius(params):
+    # radius of the biggest possible tile, so candidates stay valid whatever gets re-sampled
+    return .5 * np.sqrt(max(params.tileSizeXMin, params.tileSizeXMax) ** 2 +
+                        max(params.tileSizeYMin, params.tileSizeYMax) ** 2 +
+                        max(params.tileSizeZMin, params.tileSizeZMax) ** 2)
+
+
+def floorCells(positions, radius):
+    # (n, 2) cell on the floor (X / Z) of every tile centre, cells are 2 * radius wide and start at 1
+    cellSize = max(2 * radius, TOLERANCE)
+    cells = np.floor(positions[:, [0, 2]] / cellSize).astype(np.int64)
+    return cells - (cells.min(axis=0) - 1)  # room for the neighbour at -1
+
+
+def candidatePairs(positions, radius):
+    # (m, 2) tile pairs whose centres are closer than 2 * radius on the floor, every pair once (a < b)
+    # every tile goes into the cell of its centre, cells are 2 * radius wide, so only neighbouring cells count
+    if not len(positions):
+        return np.empty((0, 2), dtype=np.intp)
+    cells = floorCells(positions, radius)
+    columns = cells[:, 1].max() + 2
+    keys = cells[:, 0] * columns + cells[:, 1]
+    order = np.argsort(keys, kind="stable")
+    sortedKeys = keys[order]
+
+    pairs = []
+    for dx, dz in NEIGHBOUR_CELLS:
+        neighbours = keys + dx * columns + dz
+        start = np.searchsorted(sortedKeys, neighbours, "left")
+        counts = np.searchsorted(sortedKeys, neighbours, "right") - start
+        first = np.repeat(np.arange(len(keys)), counts)
+        ranges = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        second = order[np.repeat(start, counts) + ranges]
+        if (dx, dz) == (0, 0):
+            keep = first < second
+            first, second = first[keep], second[keep]
+        pairs.append(np.stack((np.minimum(first, second), np.maximum(first, second)), axis=1))
+
+    pairs = np.concatenate(pairs)
+    close = ((positions[pairs[:, 0]] - positions[pairs[:, 1]])[:, [0, 2]] ** 2).sum(axis=1) < (2 * radius) ** 2
+    return pairs[close]
+
+
+def boundsExtents(layout, tiles=slice(None)):
+    # (n, 3) half size of the axis aligned bounds of the given tiles (all by default)
+    halves = layout.sizes[tiles][:, [0, 2, 1]] / 2  # sizeX is the width (X), sizeY the depth (Z), sizeZ the height (Y)
+    return np.einsum("nij,nj->ni", np.abs(tm.rotationMatrices(layout.rotations[tiles])), halves)
+
+
+def boxesOverlap(layout, pairs, chunkSize=100000):
+    # (m,) bool, pairs whose bounds overlap get the exact test of their oriented boxes, in chunks to bound the memory
+    distances = np.abs(layout.positions[pairs[:, 1]] - layout.positions[pairs[:, 0]])
+    extents = boundsExtents(layout, pairs[:, 0]) + boundsExtents(layout, pairs[:, 1])
+    overlap = (distances < extents - TOLERANCE).all(axis=1)
+    close = np.flatnonzero(overlap)
+    for start in range(0, len(close), chunkSize):
+        chunk = close[start:start + chunkSize]
+        overlap[chunk] = separatingAxisOverlap(layout, pairs[chunk])
+    return overlap
+
+
+def separatingAxisOverlap(layout, pairs):
+    # separating axis test of the oriented boxes of every pair
+    a, b = pairs.T
+    # columns of the rotation are the local axes, sizeX is the width (X), sizeY the depth (Z), sizeZ the height (Y)
+    axesA, axesB = tm.rotationMatrices(layout.rotations[a]), tm.rotationMatrices(layout.rotations[b])
+    halfA, halfB = layout.sizes[a][:, [0, 2, 1]] / 2, layout.sizes[b][:, [0, 2, 1]] / 2
+    offset = layout.positions[b] - layout.positions[a]
+
+    # face normals of both boxes and the cross products of their edges
+    testAxes = [axesA[:, :, k] for k in range(3)] + [axesB[:, :, k] for k in range(3)]
+    testAxes += [np.cross(axesA[:, :, k], axesB[:, :, l]) for k in range(3) for l in range(3)]
+
+    overlap = np.ones(len(pairs), dtype=bool)
+    for axis in testAxes:
+        projectedA = (np.abs(np.einsum("mi,mik->mk", axis, axesA)) * halfA).sum(axis=1)
+        projectedB = (np.abs(np.einsum("mi,mik->mk", axis, axesB)) * halfB).sum(axis=1)
+        length = np.linalg.norm(axis, axis=1)
+        # (nearly) parallel edges give no usable axis, the face normals cover that case
+        overlap &= (length < PARALLEL) | (np.abs((axis * offset).sum(axis=1)) < projectedA + projectedB - TOLERANCE * length)
+    return overlap
+
+
+def findOverlaps(layout, params):
+    # (m, 2) pairs of overlapping tiles
+    pairs = candidatePairs(layout.positions, maxRadius(params))
+    return pairs[boxesOverlap(layout, pairs)]
+
+
+def resolveOverlaps(layout, params, maxPasses=48):
+    # changes the layout in place until no tiles overlap (or maxPasses is reached), returns an OverlapReport
+    # sizes and floor positions stay as they are, only the rotation and height of overlapping tiles change:
+    # every overlapping tile's rotation shrinks towards the smallest rotation in range until it is clear,
+    # tiles that still overlap at that rotation get their height nudged or their rotation (and height) re-sampled,
+    # one tile of every pair at a time, and keep the change only when it overlaps fewer tiles than before,
+    # every new value stays within the min / max range of its parameter
+    pairs = candidatePairs(layout.positions, maxRadius(params))
+    overlapping = boxesOverlap(layout, pairs)
+    found = overlapping.copy()
+    index = pairIndex(pairs, len(layout))
+    targets = rotationTargets(params)
+    classes = tileClasses(layout.positions, maxRadius(params))
+    stuck = np.zeros(len(layout), dtype=bool)  # tiles that would overlap more with a smaller rotation
+
+    passes = 0
+    fallbacks = 0
+    cycleStart = overlapping.sum()
+    while overlapping.any() and passes < maxPasses:
+        conflicts = pairs[overlapping]
+        tiles = np.unique(conflicts)
+        shrinking = tiles[(layout.rotations[tiles] != targets).any(axis=1) & ~stuck[tiles]]
+        if len(shrinking):
+            # a smaller rotation may still overlap, as long as it doesn't overlap more tiles
+            before = overlapping.sum()
+            stuck[changeTiles(layout, pairs, index, overlapping, classes, shrinking,
+                              lambda tiles: reduceRotation(layout, targets, tiles))] = True
+            if before - overlapping.sum() <= len(shrinking) // 100:
+                # shrinking hardly clears anything anymore, the fallbacks get the remaining tiles
+                stuck[shrinking] = True
+        else:
+            # the later and the earlier tile of the pairs in turns, as positions stay put only one of them may fit
+            moving = fallbacks % 2
+            tiles, first = np.unique(conflicts[:, moving], return_index=True)
+            others = conflicts[first, 1 - moving]
+            if fallbacks % 3 == 0:
+                otherOf = dict(zip(tiles.tolist(), others.tolist()))
+                change = lambda changed: nudgeHeight(layout, params, changed,  # noqa: E731
+                                                     np.array([otherOf[tile] for tile in changed.tolist()]))
+            else:
+                keep = SIZES + ("height",) if fallbacks % 3 == 1 else SIZES
+                variant = RESOLVE_VARIANT + fallbacks
+                change = lambda changed: tl.resampleTiles(layout, params, changed, keep, variant)  # noqa: E731
+            reverted = changeTiles(layout, pairs, index, overlapping, classes, tiles, change, strict=True)
+            kept = np.setdiff1d(tiles, reverted)
+            stuck[kept] = False  # new values, their rotation may shrink again
+            fallbacks += 1
+            if fallbacks % 3 == 0:
+                # a nudge and two re-samples that fixed nothing, the remaining tiles won't get better either
+                if overlapping.sum() >= cycleStart:
+                    passes += 1
+                    break
+                cycleStart = overlapping.sum()
+        passes += 1
+
+    return OverlapReport(int(found.sum()), int((found & ~overlapping).sum()), int(overlapping.sum()), passes)
+
+
+def pairIndex(pairs, count):
+    # (starts, pairIds), the candidate pairs of tile t are pairIds[starts[t]:starts[t + 1]]
+    ends = pairs.reshape(-1)
+    pairIds = np.argsort(ends, kind="stable") // 2
+    starts = np.concatenate(([0], np.cumsum(np.bincount(ends, minlength=count))))
+    return starts, pairIds
+
+
+def pairsOf(index, tiles):
+    # (sum of lengths,) candidate pairs of the tiles, tile after tile, and (len(tiles),) how many each one has
+    starts, pairIds = index
+    lengths = starts[tiles + 1] - starts[tiles]
+    offsets = np.repeat(starts[tiles] - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+    return pairIds[offsets], lengths
+
+
+def overlapCounts(index, overlapping, tiles):
+    # (len(tiles),) number of tiles every tile overlaps
+    tilePairs, lengths = pairsOf(index, tiles)
+    owners = np.repeat(np.arange(len(tiles)), lengths)
+    return np.bincount(owners, weights=overlapping[tilePairs], minlength=len(tiles))
+
+
+def retestPairs(layout, pairs, index, overlapping, tiles):
+    # only pairs with a changed tile have to be tested again
+    retest = np.unique(pairsOf(index, tiles)[0])
+    overlapping[retest] = boxesOverlap(layout, pairs[retest])
+
+
+def tileClasses(positions, radius):
+    # (n,) class of every tile, tiles of the same class are never candidates of each other,
+    # so changing them at once still tells exactly how each change affects the overlaps
+    # a class is the parity of the floor cell plus the rank of the tile within its cell: tiles of cells
+    # with the same parity are two cells (more than 2 * radius) apart, or in the same cell with another rank
+    if not len(positions):
+        return np.empty(0, dtype=np.int64)
+    cells = floorCells(positions, radius)
+    keys = cells[:, 0] * (cells[:, 1].max() + 2) + cells[:, 1]
+    order = np.argsort(keys, kind="stable")
+    sortedKeys = keys[order]
+    rank = np.empty(len(keys), dtype=np.int64)
+    rank[order] = np.arange(len(keys)) - np.searchsorted(sortedKeys, sortedKeys, "left")
+    return rank * 4 + (cells[:, 0] % 2) * 2 + cells[:, 1] % 2
+
+
+def changeTiles(layout, pairs, index, overlapping, classes, tiles, change, strict=False):
+    # applies change to the tiles, one class at a time, and takes it back for tiles that overlap more tiles
+    # than before (strict: not fewer), so the overlapping pairs never get more (strict: fewer)
+    # overlapping is kept up to date, returns the tiles whose change was taken back
+    reverted = []
+    for tileClass in np.unique(classes[tiles]):
+        changed = tiles[classes[tiles] == tileClass]
+        before = overlapCounts(index, overlapping, changed)
+        positions, rotations = layout.positions[changed].copy(), layout.rotations[changed].copy()
+        change(changed)
+        retestPairs(layout, pairs, index, overlapping, changed)
+
+        after = overlapCounts(index, overlapping, changed)
+        worse = after >= before if strict else after > before
+        if worse.any():
+            layout.positions[changed[worse]] = positions[worse]
+            layout.rotations[changed[worse]] = rotations[worse]
+            retestPairs(layout, pairs, index, overlapping, changed[worse])
+            reverted.append(changed[worse])
+    return np.concatenate(reverted) if reverted else np.empty(0, dtype=np.intp)
+
+
+def rotationTargets(params):
+    # (3,) rotation closest to 0 that is still in range, per axis
+    targets = []
+    for low, high in (("rotationXMin", "rotationXMax"), ("rotationYMin", "rotationYMax"),
+                      ("rotationZMin", "rotationZMax")):
+        low, high = sorted((getattr(params, low), getattr(params, high)))
+        targets.append(min(max(0, low), high))
+    return np.array(targets, dtype=float)
+
+
+def reduceRotation(layout, targets, tiles):
+    # halves the rotation towards the target rotation, close enough it snaps to the target
+    rotations = targets + (layout.rotations[tiles] - targets) / 2
+    rotations = np.where(np.abs(rotations - targets) < SNAP, targets, rotations)
+    layout.rotations[tiles] = rotations
+
+
+def nudgeHeight(layout, params, tiles, others):
+    # moves tiles up or down (away from the tile they overlap) until their bounds are apart, within range
+    low, high = sorted((params.heightVariationMin, params.heightVariationMax))
+    difference = layout.positions[tiles, 1] - layout.positions[others, 1]
+    direction = np.where(difference >= 0, 1, -1)
+    needed = boundsExtents(layout, tiles)[:, 1] + boundsExtents(layout, others)[:, 1] - np.abs(difference) + TOLERANCE
+    layout.positions[tiles, 1] = np.clip(layout.positions[tiles, 1] + direction * needed, low, high)
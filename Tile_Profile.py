@@ -0,0 +1,158 @@
+# optional profiling of the generator: wall time and call count of every phase of a run
+# (generate, re-gen, clear, ...) and, if wanted, of every maya.cmds command used during the run
+# switched off, a run or phase is a single attribute check that hands out a shared no-op context
+import collections
+import functools
+import time
+
+
+class NullContext:
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exception):
+        return False
+
+
+NULL_CONTEXT = NullContext()
+
+
+class RunStats:
+    # everything measured during one run, phases and commands map to [calls, seconds]
+    def __init__(self, name):
+        self.name = name
+        self.seconds = 0.0
+        self.phases = collections.OrderedDict()
+        self.commands = collections.OrderedDict()
+        self.counters = collections.Counter()  # anything else worth counting (tiles, batches, ...)
+
+    def add(self, table, name, seconds):
+        entry = table.setdefault(name, [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+    def asDict(self):
+        return {"name": self.name, "seconds": self.seconds,
+                "phases": {name: {"calls": calls, "seconds": seconds} for name, (calls, seconds) in self.phases.items()},
+                "commands": {name: {"calls": calls, "seconds": seconds}
+                             for name, (calls, seconds) in self.commands.items()},
+                "counters": dict(self.counters)}
+
+    def __str__(self):
+        # one log line, phases in the order they first ran
+        parts = ["{name} {seconds:.3f}s".format(name=self.name, seconds=self.seconds)]
+        parts += ["{name} {seconds:.3f}s/{calls}".format(name=name, seconds=seconds, calls=calls)
+                  for name, (calls, seconds) in self.phases.items()]
+        if self.counters:
+            parts.append(" ".join("{name}={count}".format(name=name, count=count)
+                                  for name, count in self.counters.items()))
+        if self.commands:
+            parts.append("commands " + " ".join("{name}:{calls}".format(name=name, calls=calls)
+                                                for name, (calls, seconds) in self.commands.items()))
+        return " | ".join(parts)
+
+
+class PhaseTimer:
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self.stats
+
+    def __exit__(self, *exception):
+        self.stats.add(self.stats.phases, self.name, time.perf_counter() - self.start)
+        return False
+
+
+class CountingCmds:
+    # stands in for maya.cmds during a profiled run, counts and times every command
+    def __init__(self, cmds, stats):
+        self.cmds = cmds
+        self.stats = stats
+        self.wrapped = {}
+
+    def __getattr__(self, name):
+        if name not in self.wrapped:
+            command = getattr(self.cmds, name)
+            if not callable(command):
+                return command
+
+            @functools.wraps(command)
+            def counted(*args, **flags):
+                start = time.perf_counter()
+                try:
+                    return command(*args, **flags)
+                finally:
+                    self.stats.add(self.stats.commands, name, time.perf_counter() - start)
+            self.wrapped[name] = counted
+        return self.wrapped[name]
+
+
+class Profiler:
+    def __init__(self, enabled=False, log=False, countCommands=False, keep=20):
+        self.enabled = enabled
+        self.log = log  # print a line per run
+        self.countCommands = countCommands  # count every maya.cmds command, costs a little time per command
+        self.keep = keep
+        self.current = None  # RunStats of the run in progress
+        self.history = collections.deque(maxlen=keep)  # RunStats of the last runs, newest last
+
+    @property
+    def last(self):
+        return self.history[-1] if self.history else None
+
+    def run(self, name, backend=None):
+        # a run nested in another one (e.g. generate calls clear) is part of the outer run
+        if not self.enabled or self.current is not None:
+            return NULL_CONTEXT
+        return ProfiledRun(self, name, backend)
+
+    def phase(self, name):
+        if self.current is None:
+            return NULL_CONTEXT
+        return PhaseTimer(self.current, name)
+
+    def count(self, name, amount=1):
+        if self.current is not None:
+            self.current.counters[name] += amount
+
+
+class ProfiledRun:
+    def __init__(self, profiler, name, backend):
+        self.profiler = profiler
+        self.stats = RunStats(name)
+        self.backend = backend
+
+    def __enter__(self):
+        self.profiler.current = self.stats
+        if self.backend is not None:
+            self.backend.profiler = self.profiler
+            if self.profiler.countCommands:
+                self.backend.cmds = CountingCmds(self.backend.cmds, self.stats)
+        self.start = time.perf_counter()
+        return self.stats
+
+    def __exit__(self, *exception):
+        self.stats.seconds = time.perf_counter() - self.start
+        if self.backend is not None:
+            self.backend.profiler = None
+            if isinstance(self.backend.cmds, CountingCmds):
+                self.backend.cmds = self.backend.cmds.cmds
+        self.profiler.current = None
+        self.profiler.history.append(self.stats)
+        if self.profiler.log:
+            print(self.stats)
+        return False
+
+
+def profiled(name):
+    # method decorator: the method is one run of the profiler of its object (self.profiler, self.backend)
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **flags):
+            with self.profiler.run(name, self.backend):
+                return method(self, *args, **flags)
+        return wrapper
+    return decorate
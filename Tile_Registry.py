@@ -0,0 +1,116 @@
+# registry of generated tiles, so Re-Gen Selection finds a tile's nodes and grid index without scene queries
+# every generation lives in its own group in the scene, tagged with the parameters and seed that made it,
+# so the registry can be rebuilt after a scene reload and a generation is cleared by deleting one node
+import json
+import time
+
+import numpy as np
+
+import Tile_Layout as tl
+
+GENERATION_ATTR = "tileGenerator"  # JSON with format version, output mode, parameters (incl. seed), creation time
+INDEX_ATTR = "tileIndices"  # Int32Array with the (i, j) of every child of the group, in child order
+FORMAT_VERSION = 1
+
+SOURCE_INDEX = (-1, -1)  # index stored for the hidden source of instanced tiles
+
+
+class TileRegistry:
+    def __init__(self):
+        # transform -> (i, j, seed, node that holds the size, instanced, generation group)
+        # the size sits on the polyCube node, or on the transform itself (as scale) for instanced tiles,
+        # None when it still has to be looked up (tiles restored from the scene)
+        self.records = {}
+        self.generations = {}  # generation group -> transforms, oldest generation first
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, transform):
+        return transform in self.records
+
+    def add(self, tiles, indices, seed, instanced=False, group=None):
+        # tiles as generated: [transform, polyCube] or [transform] for instances
+        transforms = self.generations.setdefault(group, set())
+        for tile, (i, j) in zip(tiles, indices):
+            if instanced:
+                sizeNode = tile[0]
+            else:
+                sizeNode = tile[1] if len(tile) > 1 else None
+            self.records[tile[0]] = (i, j, seed, sizeNode, instanced, group)
+            transforms.add(tile[0])
+
+    def addNodes(self, nodes, group):
+        # nodes of a generation that are not tiles themselves (merged meshes, the source of instances)
+        self.generations.setdefault(group, set()).update(nodes)
+
+    def setSizeNode(self, transform, sizeNode):
+        self.records[transform] = self.records[transform][:3] + (sizeNode,) + self.records[transform][4:]
+
+    def remove(self, transforms):
+        for transform in transforms:
+            record = self.records.pop(transform, None)
+            if record is not None:
+                self.generations[record[5]].discard(transform)
+
+    def removeNodes(self, nodes, group):
+        # forgets nodes of a generation, tiles or not (e.g. the source of instances)
+        self.remove(nodes)
+        self.generations.get(group, set()).difference_update(nodes)
+
+    def removeGeneration(self, group):
+        # forgets a whole generation, returns the nodes that belonged to it
+        nodes = self.generations.pop(group, set())
+        for transform in nodes:
+            self.records.pop(transform, None)
+        return nodes
+
+    def clear(self):
+        self.records.clear()
+        self.generations.clear()
+
+    def lookup(self, items):
+        # splits items into registered tiles, as (transform,) + record, and everything else
+        tiles = [(item,) + self.records[item] for item in items if item in self.records]
+        others = [item for item in items if item not in self.records]
+        return tiles, others
+
+
+def recordColumns(tiles):
+    # (transform, i, j, seed, size node, instanced, ...) rows -> one list / array per field
+    return {"transforms": [tile[0] for tile in tiles],
+            "i": np.array([tile[1] for tile in tiles], dtype=np.uint64),
+            "j": np.array([tile[2] for tile in tiles], dtype=np.uint64),
+            "seeds": tl.seedBits([tile[3] for tile in tiles]),
+            "sizeNodes": [tile[4] for tile in tiles],
+            "instanced": np.array([tile[5] for tile in tiles], dtype=bool)}
+
+
+def generationData(params, mode, resolved=False):
+    # what gets stored on the group of a generation, resolved tells overlaps were resolved after the layout
+    return json.dumps({"version": FORMAT_VERSION, "mode": mode, "created": time.time(),
+                       "params": dict(zip(params.FIELDS, params.values())), "resolveOverlaps": resolved})
+
+
+def findGenerations(cmds):
+    # generation groups in the scene with their stored data, oldest first
+    generations = []
+    for group in cmds.ls("*." + GENERATION_ATTR, objectsOnly=True) or []:
+        try:
+            data = json.loads(cmds.getAttr("{group}.{attr}".format(group=group, attr=GENERATION_ATTR)))
+        except (TypeError, ValueError):
+            continue  # not written by this tool (or damaged)
+        if data.get("version") == FORMAT_VERSION:
+            generations.append((data["created"], group, data))
+    return [(group, data) for created, group, data in sorted(generations, key=lambda generation: generation[0])]
+
+
+def readGeneration(cmds, group):
+    # children of a generation group and their (i, j)
+    # indices is None when they don't match the children anymore (e.g. tiles deleted by hand)
+    children = cmds.listRelatives(group, children=True, type="transform") or []
+    indices = cmds.getAttr("{group}.{attr}".format(group=group, attr=INDEX_ATTR)) or []
+    indices = np.array(indices, dtype=np.int64).reshape(-1, 2)
+    if len(indices) != len(children):
+        indices = None
+    return children, indices
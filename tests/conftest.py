@@ -0,0 +1,30 @@
+# the Tile_* modules live in the repository root, the generator runs against the recording stand-in for maya.cmds
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Tile_Benchmark as tb  # noqa: E402
+import Tile_Commit as tc  # noqa: E402
+
+
+@pytest.fixture
+def generatorModule():
+    return tb.loadGenerator()
+
+
+@pytest.fixture
+def makeGenerator(generatorModule):
+    # TileGenerator with a fresh in-memory scene, returns (generator, cmds)
+    def make(mode="cubes", tileX=6, tileY=4, seed=0):
+        cmds = tc.RecordingCmds()
+        generator = generatorModule.TileGenerator()
+        generator.backend = tc.RecordingBackend(cmds)
+        generator.outputMode = mode
+        generator.tileX = tileX
+        generator.tileY = tileY
+        generator.seed = seed
+        return generator, cmds
+    return make
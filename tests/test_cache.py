@@ -0,0 +1,66 @@
+import Tile_Cache as tca
+import Tile_Layout as tl
+
+
+def layoutOf(seed, tileX=10, tileY=10):
+    params = tl.LayoutParams(tileX=tileX, tileY=tileY, seed=seed)
+    return tca.layoutKey(params), tl.computeLayout(params)
+
+
+def test_leastRecentlyUsedIsEvicted():
+    keyA, layoutA = layoutOf(1)
+    keyB, layoutB = layoutOf(2)
+    keyC, layoutC = layoutOf(3)
+    cache = tca.LayoutCache(budget=2 * tca.layoutBytes(layoutA))
+    cache.put(keyA, layoutA)
+    cache.put(keyB, layoutB)
+    assert cache.get(keyA) is not None  # B is now the least recently used
+    cache.put(keyC, layoutC)
+    assert keyA in cache and keyC in cache and keyB not in cache
+    assert (cache.hits, cache.evictions, len(cache)) == (1, 1, 2)
+    assert cache.size == 2 * tca.layoutBytes(layoutA)
+
+
+def test_resizeEvicts():
+    cache = tca.LayoutCache()
+    keys = []
+    for seed in range(4):
+        key, layout = layoutOf(seed)
+        cache.put(key, layout)
+        keys.append(key)
+    cache.resize(tca.layoutBytes(layout))
+    assert list(cache.entries) == keys[-1:]
+    assert cache.evictions == 3
+    cache.resize(0)
+    assert len(cache) == 0 and cache.size == 0
+
+
+def test_layoutsBeyondTheBudgetAreNotStored():
+    key, layout = layoutOf(1)
+    cache = tca.LayoutCache(budget=tca.layoutBytes(layout) - 1)
+    cache.put(key, layout)
+    assert len(cache) == 0 and cache.size == 0
+    assert not cache.fits(len(layout))
+    assert cache.get(key) is None and cache.misses == 1
+
+
+def test_getCopies():
+    key, layout = layoutOf(1)
+    cache = tca.LayoutCache()
+    cache.put(key, layout)
+    layout.positions[:] = 0  # the cache keeps its own copy
+    copied = cache.get(key)[0]
+    assert copied.positions.any()
+    copied.positions[:] = 0
+    shared = cache.get(key, copy=False)[0]
+    assert shared.positions.any()
+    assert cache.get(key, copy=False)[0] is shared
+
+
+def test_keyMatchesIntAndFloatValues():
+    params = tl.LayoutParams(tileX=10, tileY=10, seed=1)
+    same = tl.LayoutParams(tileX=10.0, tileY=10.0, seed=1.0)
+    assert tca.layoutKey(params) == tca.layoutKey(same)
+    assert tca.layoutKey(params) != tca.layoutKey(params, resolved=True)
+    assert tca.layoutKey(params, rows=20) == tca.layoutKey(params)
+    assert tca.layoutKey(params, rows=5) != tca.layoutKey(params)
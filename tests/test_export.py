@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+import Tile_Export as te
+import Tile_Layout as tl
+import Tile_Mesh as tm
+
+
+def readOBJ(path):
+    points, faces = [], []
+    with open(path) as objFile:
+        for line in objFile:
+            if line.startswith("v "):
+                points.append([float(value) for value in line.split()[1:]])
+            elif line.startswith("f "):
+                faces.append([int(value) - 1 for value in line.split()[1:]])
+    return np.array(points, dtype=np.float32).reshape(-1, 3), np.array(faces, dtype=np.int64).reshape(-1, 4)
+
+
+def readPLY(path):
+    with open(path, "rb") as plyFile:
+        header = b""
+        while not header.endswith(b"end_header\n"):
+            header += plyFile.readline()
+        counts = dict(line.split()[1:3] for line in header.decode().splitlines() if line.startswith("element"))
+        vertices = np.fromfile(plyFile, dtype=te.PLY_VERTEX, count=int(counts["vertex"]))
+        faces = np.fromfile(plyFile, dtype=te.PLY_FACE, count=int(counts["face"]))
+    assert (faces["count"] == 4).all()
+    return vertices["position"], faces["vertices"].astype(np.int64)
+
+
+@pytest.mark.parametrize("extension, read", [(".obj", readOBJ), (".ply", readPLY)])
+def test_exportMatchesMayaMesh(tmp_path, extension, read):
+    # the same points and faces the merged mesh (and the polyCubes) of the generator get for the seed
+    params = tl.LayoutParams(tileX=7, tileY=5, seed=31, rotationZMax=20)
+    path = str(tmp_path / ("floor" + extension))
+    assert te.exportLayout(path, params, blockSize=10) == 31
+
+    buffers = tm.buildMeshBuffers(tl.computeLayout(params))
+    points, faces = read(path)
+    np.testing.assert_array_equal(points, buffers.points.astype(np.float32))
+    np.testing.assert_array_equal(faces.reshape(-1), buffers.faceConnects)
+
+
+@pytest.mark.parametrize("extension, read", [(".obj", readOBJ), (".ply", readPLY)])
+def test_exportEmptyGrid(tmp_path, extension, read):
+    path = str(tmp_path / ("floor" + extension))
+    te.main([path, "--tiles", "3", "0", "--seed", "4"])
+    points, faces = read(path)
+    assert len(points) == 0 and len(faces) == 0
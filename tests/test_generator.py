@@ -0,0 +1,382 @@
+import sys
+
+import numpy as np
+import pytest
+
+import Tile_Layout as tl
+import Tile_Mesh as tm
+import Tile_Registry as tr
+
+
+def tileValues(generator, cmds):
+    # (translate, rotate) of every generated tile by grid index
+    return {index: (cmds.nodes[tile[0]]["translate"], cmds.nodes[tile[0]]["rotate"])
+            for index, tile in generator.tileNodes.items()}
+
+
+@pytest.mark.parametrize("mode", ["cubes", "instanced", "merged"])
+def test_generateAndClear(makeGenerator, mode):
+    generator, cmds = makeGenerator(mode, seed=12)
+    generator.buildTiles()
+    groups = tr.findGenerations(cmds)
+    assert [group for group, data in groups] == [generator.currentGroup]
+    assert groups[0][1]["params"]["seed"] == 12
+    assert cmds.openChunks == 0
+
+    children = cmds.listRelatives(generator.currentGroup, children=True)
+    if mode == "merged":
+        assert len(children) == 1
+        layout = generator.mergedLayouts[children[0]]
+        shape = cmds.shapes[children[0]]
+        assert len(cmds.nodes[shape]["points"]) == 24 * 8
+        np.testing.assert_array_equal(layout.positions, tl.computeLayout(generator.layoutParams()).positions)
+    else:
+        assert len(generator.registry) == 24
+        layout = tl.computeLayout(generator.layoutParams())
+        for (i, j), (translate, rotate) in tileValues(generator, cmds).items():
+            np.testing.assert_allclose(translate, layout.positions[layout.index(i, j)])
+            np.testing.assert_allclose(rotate, layout.rotations[layout.index(i, j)])
+
+    generator.clearTiles()
+    assert tr.findGenerations(cmds) == []
+    assert len(generator.registry) == 0
+    assert generator.currentGroup is None
+
+
+def test_updateInPlace(makeGenerator):
+    generator, cmds = makeGenerator("cubes", seed=3)
+    generator.buildTiles()
+    group = generator.currentGroup
+    generator.rotationZMax = 30
+    generator.tileX = 8
+    generator.buildTiles()
+
+    # the same generation, two more rows, values of the new parameters
+    assert generator.currentGroup == group
+    assert len(generator.registry) == 32
+    layout = tl.computeLayout(generator.layoutParams())
+    for (i, j), (translate, rotate) in tileValues(generator, cmds).items():
+        np.testing.assert_allclose(translate, layout.positions[layout.index(i, j)])
+        np.testing.assert_allclose(rotate, layout.rotations[layout.index(i, j)])
+    assert len(cmds.listRelatives(group, children=True)) == 32
+
+
+def test_emptyGrid(makeGenerator):
+    generator, cmds = makeGenerator("cubes", tileX=3, tileY=0, seed=1)
+    generator.buildTiles()
+    assert len(generator.registry) == 0
+
+
+def test_reloadFindsGenerations(makeGenerator, generatorModule):
+    generator, cmds = makeGenerator("cubes", seed=5)
+    generator.buildTiles()
+    generator.clear = False
+    generator.buildTiles()
+
+    reloaded = generatorModule.TileGenerator()
+    reloaded.backend = generator.backend
+    reloaded.loadGenerations()
+    assert set(reloaded.registry.generations) == set(generator.registry.generations)
+    assert len(reloaded.registry) == 48
+    assert reloaded.currentGroup == generator.currentGroup
+
+
+def test_syncWithScene(makeGenerator):
+    # an undone generate takes its group out of the scene, the generator follows the scene
+    generator, cmds = makeGenerator("cubes", seed=4)
+    generator.buildTiles()
+    first = generator.currentGroup
+    generator.clear = False
+    generator.buildTiles()
+    cmds.delete(generator.currentGroup)
+
+    generator.syncWithScene()
+    assert generator.currentGroup == first
+    assert set(generator.registry.generations) == {first}
+    assert len(generator.registry) == 24
+    # the records of the generation that is left keep their polyCubes, so Re-Gen needs no lookups
+    # and generate can update its tiles in place again
+    assert all(record[3] is not None for record in generator.registry.records.values())
+    cmds.selection = list(generator.registry.records)
+    calls = cmds.callCounts.copy()
+    generator.reGenerateSelection()
+    assert (cmds.callCounts - calls)["listRelatives"] == 0
+    generator.clear = True
+    generator.rotationZMax = 30
+    generator.buildTiles()
+    assert generator.currentGroup == first
+
+    cmds.delete(first)
+    generator.syncWithScene()
+    assert generator.currentGroup is None and len(generator.registry) == 0
+    generator.buildTiles()
+    assert len(tr.findGenerations(cmds)) == 1
+
+
+def test_syncWithSceneKeepsUnchangedGenerations(makeGenerator):
+    # an undo that didn't touch the tiles (e.g. of a selection change) keeps everything the generator knows
+    generator, cmds = makeGenerator("cubes", seed=4)
+    generator.buildTiles()
+    params, records = generator.currentParams, dict(generator.registry.records)
+    generator.syncWithScene()
+    assert generator.currentParams is params
+    assert generator.registry.records == records
+
+
+def test_syncWithSceneAfterUndoneUpdate(makeGenerator):
+    # undoing an update brings back the data of the group, the generator follows it
+    generator, cmds = makeGenerator("instanced", seed=4)
+    generator.buildTiles()
+    data = cmds.nodes[generator.currentGroup][tr.GENERATION_ATTR]
+    generator.rotationZMax = 30
+    generator.buildTiles()
+    cmds.nodes[generator.currentGroup][tr.GENERATION_ATTR] = data
+    generator.syncWithScene()
+    assert generator.currentParams.rotationZMax == 15
+    assert len(generator.tileNodes) == 24
+
+
+def test_reGenerateWithNegativeSeed(makeGenerator):
+    generator, cmds = makeGenerator("cubes", seed=-7)
+    generator.buildTiles()
+    cmds.selection = [tile[0] for tile in generator.tileNodes.values()]
+    generator.reGenerateSelection()
+    assert generator.currentParams.seed == -7
+
+
+@pytest.mark.parametrize("mode", ["cubes", "instanced", "merged"])
+def test_reGenerateMatchesAcrossModes(makeGenerator, mode):
+    # the same seed gives the same re-generated tiles in every output mode
+    generator, cmds = makeGenerator(mode, seed=21)
+    generator.buildTiles()
+    layout = tl.computeLayout(generator.layoutParams())
+    tl.resampleTiles(layout, generator.layoutParams(), np.arange(len(layout)), variant=1)
+
+    if mode == "merged":
+        cmds.selection = list(generator.mergedLayouts)
+    else:
+        cmds.selection = [tile[0] for tile in generator.tileNodes.values()]
+    generator.reGenerateSelection()
+
+    if mode == "merged":
+        mesh = cmds.selection[0]
+        np.testing.assert_allclose(cmds.nodes[cmds.shapes[mesh]]["points"],
+                                   tm.tilePoints(layout.sizes, layout.positions, layout.rotations).reshape(-1, 3))
+        return
+    for (i, j), tile in generator.tileNodes.items():
+        n = layout.index(i, j)
+        transform = cmds.nodes[tile[0]]
+        assert transform["translate"][1] == pytest.approx(layout.positions[n, 1])
+        np.testing.assert_allclose(transform["rotate"], layout.rotations[n])
+        if mode == "cubes":
+            size = [cmds.nodes[tile[1]][attr] for attr in ("width", "depth", "height")]
+        else:
+            size = [transform["scale"][axis] for axis in (0, 2, 1)]
+        np.testing.assert_allclose(size, layout.sizes[n])
+
+
+def test_clearSelectedAfterSeedUpdate(makeGenerator):
+    # generate twice with a random seed builds the tiles again with a new seed,
+    # the tiles of the new generation are registered under its group
+    generator, cmds = makeGenerator("cubes", seed=0)
+    generator.buildTiles()
+    group = generator.currentGroup
+    generator.buildTiles()
+    assert generator.currentGroup != group
+    assert set(generator.registry.generations) == {generator.currentGroup}
+
+    group = generator.currentGroup
+    cmds.selection = [next(iter(generator.tileNodes.values()))[0]]
+    generator.clearSelectedGenerations()
+    assert group not in cmds.nodes
+    assert len(generator.registry) == 0 and not generator.registry.generations
+
+
+@pytest.mark.parametrize("mode, changes, calls", [
+    ("cubes", {"rotationZMax": 30, "heightVariationMax": .5}, {"xform": 24}),
+    ("cubes", {"tileSizeZMax": 1}, {"polyCube": 24}),
+    ("instanced", {"tileSizeZMax": 1, "rotationZMax": 30}, {"xform": 24}),
+])
+def test_updateCallsPerTile(makeGenerator, mode, changes, calls):
+    # an update costs at most one command per tile
+    generator, cmds = makeGenerator(mode, seed=3)
+    generator.buildTiles()
+    group = generator.currentGroup
+    for name, value in changes.items():
+        setattr(generator, name, value)
+    before = cmds.callCounts.copy()
+    generator.buildTiles()
+    counts = cmds.callCounts - before
+    assert generator.currentGroup == group
+    assert {command: counts[command] for command in ("polyCube", "xform") if counts[command]} == calls
+    assert counts["setAttr"] <= 4  # data of the group and visibility of the source, once per generation
+    layout = tl.computeLayout(generator.layoutParams())
+    for (i, j), (translate, rotate) in tileValues(generator, cmds).items():
+        np.testing.assert_allclose(translate, layout.positions[layout.index(i, j)])
+        np.testing.assert_allclose(rotate, layout.rotations[layout.index(i, j)])
+
+
+def test_newSeedOrSizeAndTransformRebuild(makeGenerator):
+    generator, cmds = makeGenerator("cubes", seed=3)
+    generator.buildTiles()
+    group = generator.currentGroup
+    generator.seed = 4
+    generator.buildTiles()
+    assert generator.currentGroup != group
+
+    group = generator.currentGroup
+    generator.tileSizeZMax = 1
+    generator.rotationZMax = 30
+    generator.buildTiles()
+    assert generator.currentGroup != group
+
+
+def test_cancelledUpdate(makeGenerator):
+    # big updates show progress, cancelling keeps the tiles, the next generate builds them again
+    generator, cmds = makeGenerator("cubes", tileX=30, tileY=10, seed=3)
+    generator.blockSize = 100
+    generator.buildTiles()
+    group = generator.currentGroup
+    generator.rotationZMax = 30
+    generator.buildTiles()
+    assert generator.currentGroup == group and generator.currentParams is not None
+    assert (cmds.callCounts["xform"]) == 600
+
+    cmds.progressWindow = lambda *args, **flags: flags.get("query", False)  # esc pressed
+    generator.rotationZMax = 40
+    generator.buildTiles()
+    assert cmds.callCounts["xform"] == 700
+    assert generator.currentGroup == group and generator.currentParams is None
+
+
+def test_workerExecutable(generatorModule, monkeypatch, tmp_path):
+    monkeypatch.setattr(sys, "executable", str(tmp_path / "maya"))
+    assert generatorModule.workerExecutable() is None
+    (tmp_path / "mayapy").write_text("")
+    assert generatorModule.workerExecutable() == str(tmp_path / "mayapy")
+    monkeypatch.setattr(sys, "executable", str(tmp_path / "python3"))
+    assert generatorModule.workerExecutable() == str(tmp_path / "python3")
+
+
+def test_noPoolWithoutPython(makeGenerator, monkeypatch, tmp_path):
+    # inside Maya without mayapy the layout is computed in process instead of spawning Maya
+    def spawn(*args):
+        raise AssertionError("no process pool without a python executable")
+    monkeypatch.setattr(sys, "executable", str(tmp_path / "maya"))
+    monkeypatch.setattr(tl, "computeLayoutParallel", spawn)
+    generator, cmds = makeGenerator("cubes", tileX=30, tileY=20, seed=2)
+    generator.layoutProcesses = 0
+    generator.blockSize = 100
+    layout = generator.fullLayout(generator.layoutParams())
+    np.testing.assert_array_equal(layout.positions, tl.computeLayout(generator.layoutParams()).positions)
+
+
+def test_acceptPreviewUsesCurrentValues(makeGenerator):
+    generator, cmds = makeGenerator("cubes", seed=0)
+    generator.previewTiles()
+    seed = generator.previewParams.seed
+    assert generator.previewMesh in cmds.nodes
+
+    # changed within the preview delay, the preview still shows the old values
+    generator.rotationZMax = 40
+    generator.acceptPreview()
+    assert generator.previewMesh is None
+    assert generator.currentParams.seed == seed
+    assert generator.currentParams.rotationZMax == 40
+    layout = tl.computeLayout(generator.currentParams)
+    for (i, j), tile in generator.tileNodes.items():
+        np.testing.assert_allclose(cmds.nodes[tile[0]]["rotate"], layout.rotations[layout.index(i, j)])
+
+
+def test_updatesUseLayoutCache(makeGenerator):
+    generator, cmds = makeGenerator("cubes", tileX=20, tileY=20, seed=5)
+    generator.clear = True
+    for rotation in (10, 40, 10, 40, 10):
+        generator.rotationZMax = rotation
+        generator.buildTiles()
+    # A and B are computed once, every later switch back comes from the cache
+    assert (generator.layoutCache.hits, generator.layoutCache.misses) == (3, 2)
+    layout = tl.computeLayout(generator.layoutParams())
+    for (i, j), (translate, rotate) in tileValues(generator, cmds).items():
+        np.testing.assert_allclose(rotate, layout.rotations[layout.index(i, j)])
+
+
+def test_bigGridsAreStreamed(makeGenerator):
+    # grids of more than one block are computed block by block and cached as a whole after the last block,
+    # so switching back and forth hits the cache
+    generator, cmds = makeGenerator("cubes", tileX=20, tileY=20, seed=5)
+    generator.blockSize = 100
+    for rotation in (10, 40, 10, 40, 10):
+        generator.rotationZMax = rotation
+        generator.buildTiles()
+    assert (generator.layoutCache.hits, generator.layoutCache.misses) == (3, 2)
+    assert len(generator.layoutCache) == 2
+    layout = tl.computeLayout(generator.layoutParams())
+    for (i, j), (translate, rotate) in tileValues(generator, cmds).items():
+        np.testing.assert_allclose(rotate, layout.rotations[layout.index(i, j)])
+
+
+def test_gridsBeyondTheBudgetAreNotCached(makeGenerator):
+    generator, cmds = makeGenerator("cubes", tileX=20, tileY=20, seed=5)
+    generator.blockSize = 100
+    generator.layoutCache.resize(100 * 72)
+    generator.buildTiles()
+    assert len(generator.layoutCache) == 0
+    assert len(generator.registry) == 400
+
+
+@pytest.mark.parametrize("mode, calls", [("cubes", {"polyCube": 24, "xform": 24}), ("instanced", {"xform": 24})])
+def test_reGenerateCallsPerTile(makeGenerator, mode, calls):
+    # one xform per tile, cubes get one polyCube edit for their size
+    generator, cmds = makeGenerator(mode, seed=3)
+    generator.buildTiles()
+    cmds.selection = [tile[0] for tile in generator.tileNodes.values()]
+    before = cmds.callCounts.copy()
+    generator.reGenerateSelection()
+    counts = cmds.callCounts - before
+    assert {command: counts[command] for command in ("polyCube", "xform", "setAttr") if counts[command]} == calls
+
+
+def test_clearSelectedIsOneUndo(makeGenerator):
+    generator, cmds = makeGenerator("cubes", seed=3)
+    generator.buildTiles()
+    first = generator.currentGroup
+    generator.clear = False
+    generator.buildTiles()
+    generator.buildTiles()
+    cmds.selection = [first, generator.currentGroup]
+    chunks = cmds.undoChunks
+    generator.clearSelectedGenerations()
+    assert cmds.undoChunks == chunks + 1
+    assert len(tr.findGenerations(cmds)) == 1
+    assert generator.currentGroup == tr.findGenerations(cmds)[0][0]
+
+
+def test_mergedIsOneMesh(makeGenerator, tmp_path):
+    # big merged floors are still one mesh, also when they are replayed block by block from a file
+    generator, cmds = makeGenerator("merged", tileX=30, tileY=10, seed=8)
+    generator.blockSize = 100
+    generator.buildTiles()
+    children = cmds.listRelatives(generator.currentGroup, children=True)
+    assert len(children) == 1
+    assert len(cmds.nodes[cmds.shapes[children[0]]]["points"]) == 300 * 8
+
+    path = str(tmp_path / "floor.tiles")
+    generator.exportLayout(path)
+    generator.replayLayout(path)
+    children = cmds.listRelatives(generator.currentGroup, children=True)
+    assert len(children) == 1
+    np.testing.assert_array_equal(generator.mergedLayouts[children[0]].positions,
+                                  tl.computeLayout(generator.layoutParams()).positions)
+
+
+def test_partialMergedIsRebuilt(makeGenerator):
+    # meshes that don't hold every row are built again instead of being updated
+    generator, cmds = makeGenerator("merged", tileX=30, tileY=10, seed=8)
+    generator.buildTiles()
+    mesh = next(iter(generator.mergedLayouts))
+    generator.mergedLayouts[mesh] = generator.mergedLayouts[mesh].rows(0, 10)
+    generator.rotationZMax = 30
+    generator.buildTiles()
+    layouts = list(generator.mergedLayouts.values())
+    assert sum(layout.tileX for layout in layouts) == 30
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+import Tile_Layout as tl
+
+
+def layoutArrays(layout):
+    return layout.sizes, layout.positions, layout.rotations
+
+
+@pytest.mark.parametrize("rowStart, rowStop", [(0, 7), (3, 9), (11, 12), (0, 12)])
+def test_computeRowsMatchesLayout(rowStart, rowStop):
+    params = tl.LayoutParams(tileX=12, tileY=5, seed=42)
+    full = tl.computeLayout(params)
+    rows = tl.computeRows(params, rowStart, rowStop)
+    assert rows.rowStart == rowStart and rows.tileX == rowStop - rowStart
+    for part, whole in zip(layoutArrays(rows), layoutArrays(full.rows(rowStart, rowStop))):
+        np.testing.assert_array_equal(part, whole)
+    np.testing.assert_array_equal(rows.gridIndices(), full.gridIndices()[rowStart * 5:rowStop * 5])
+
+
+def test_rowBlocksCoverLayout():
+    params = tl.LayoutParams(tileX=13, tileY=7, seed=3)
+    full = tl.computeLayout(params)
+    blocks = list(tl.iterRowBlocks(params, 20))
+    assert [block.rowStart for block in blocks] == [rowStart for rowStart, rowStop in tl.rowBlocks(params, 20)]
+    for joined, whole in zip(zip(*map(layoutArrays, blocks)), layoutArrays(full)):
+        np.testing.assert_array_equal(np.concatenate(joined), whole)
+
+
+def test_sameSeedSameLayout():
+    first = tl.computeLayout(tl.LayoutParams(tileX=4, tileY=4, seed=9))
+    second = tl.computeLayout(tl.LayoutParams(tileX=4, tileY=4, seed=9))
+    other = tl.computeLayout(tl.LayoutParams(tileX=4, tileY=4, seed=10))
+    np.testing.assert_array_equal(first.positions, second.positions)
+    assert not np.array_equal(first.positions, other.positions)
+
+
+def test_valuesStayInRange():
+    params = tl.LayoutParams(tileX=20, tileY=20, seed=1)
+    layout = tl.computeLayout(params)
+    for name, (array, column) in tl.TILE_ATTRIBUTES.items():
+        low, high = (getattr(params, limit) for limit in tl.ATTRIBUTE_RANGES[name])
+        values = getattr(layout, array)[:, column]
+        assert values.min() >= low and values.max() <= high
+
+
+@pytest.mark.parametrize("tileX, tileY", [(0, 5), (5, 0), (0, 0)])
+def test_emptyGrid(tileX, tileY):
+    params = tl.LayoutParams(tileX=tileX, tileY=tileY, seed=1)
+    assert len(tl.computeLayout(params)) == 0
+    assert sum(len(block) for block in tl.iterRowBlocks(params, 10)) == 0
+
+
+def test_parallelLayoutIsIdentical():
+    params = tl.LayoutParams(tileX=40, tileY=25, seed=5)
+    serial = tl.computeLayout(params)
+    parallel = tl.computeLayoutParallel(params, processes=2, blockSize=200)
+    for a, b in zip(layoutArrays(parallel), layoutArrays(serial)):
+        assert a.tobytes() == b.tobytes()
+
+
+def test_newSeedFitsTheSeedField():
+    seeds = [tl.newSeed() for _ in range(1000)]
+    assert min(seeds) >= 1 and max(seeds) <= 2 ** 31 - 1
+
+
+def test_negativeSeed():
+    negative = tl.computeLayout(tl.LayoutParams(tileX=3, tileY=3, seed=-5))
+    wrapped = tl.computeLayout(tl.LayoutParams(tileX=3, tileY=3, seed=2 ** 64 - 5))
+    np.testing.assert_array_equal(negative.positions, wrapped.positions)
+    samples = tl.sampleTiles(tl.seedBits([-5, -5]), np.array([0, 1], dtype=np.uint64),
+                             np.array([0, 0], dtype=np.uint64), tl.LayoutParams(), 0)
+    np.testing.assert_array_equal(samples["rotX"], negative.rotations[[0, 3], 0])
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+import Tile_Layout as tl
+import Tile_LayoutFile as tlf
+
+
+def test_roundTrip(tmp_path):
+    params = tl.LayoutParams(tileX=9, tileY=4, seed=77, gapXmin=.1)
+    path = str(tmp_path / "floor.tiles")
+    tlf.saveLayout(path, params, tl.iterRowBlocks(params, 10))
+
+    layoutFile = tlf.LayoutFile(path)
+    full = tl.computeLayout(params)
+    assert len(layoutFile) == len(full)
+    assert layoutFile.params.values() == params.values()
+    assert not layoutFile.resolved
+    loaded = layoutFile.rows()
+    for name in ("sizes", "positions", "rotations"):
+        np.testing.assert_array_equal(getattr(loaded, name), getattr(full, name))
+    np.testing.assert_array_equal(layoutFile.tiles["index"], full.gridIndices())
+
+    window = layoutFile.rows(2, 5)
+    np.testing.assert_array_equal(window.positions, full.rows(2, 5).positions)
+    assert [block.rowStart for block in layoutFile.iterRowBlocks(8, 1, 7)] == [1, 3, 5]
+
+
+def test_emptyLayout(tmp_path):
+    params = tl.LayoutParams(tileX=0, tileY=4, seed=1)
+    path = str(tmp_path / "empty.tiles")
+    tlf.saveLayout(path, params, tl.iterRowBlocks(params, 10))
+    assert len(tlf.LayoutFile(path)) == 0
+
+
+def test_rejectsOtherFiles(tmp_path):
+    path = tmp_path / "other.tiles"
+    path.write_bytes(b"not a layout" * 4)
+    with pytest.raises(ValueError):
+        tlf.LayoutFile(str(path))
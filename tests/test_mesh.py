@@ -0,0 +1,48 @@
+import numpy as np
+
+import Tile_Layout as tl
+import Tile_Mesh as tm
+
+# vertices and faces of polyCube -w 1 -h 1 -d 1, as Maya lists them
+POLYCUBE_POINTS = [(-.5, -.5, .5), (.5, -.5, .5), (-.5, .5, .5), (.5, .5, .5),
+                   (-.5, .5, -.5), (.5, .5, -.5), (-.5, -.5, -.5), (.5, -.5, -.5)]
+POLYCUBE_FACES = [(0, 1, 3, 2), (2, 3, 5, 4), (4, 5, 7, 6), (6, 7, 1, 0), (1, 7, 5, 3), (6, 0, 2, 4)]
+
+
+def singleTile(size, position=(0, 0, 0), rotation=(0, 0, 0)):
+    return tl.TileLayout(1, 1, np.array([size], dtype=float), np.array([position], dtype=float),
+                         np.array([rotation], dtype=float))
+
+
+def test_pointsFollowPolyCube():
+    # sizeX is the width, sizeY the depth and sizeZ the height, as in polyCube(w=sizeX, h=sizeZ, d=sizeY)
+    buffers = tm.buildMeshBuffers(singleTile((2, 3, .5), position=(1, 2, 3)))
+    expected = np.array(POLYCUBE_POINTS) * (2, .5, 3) + (1, 2, 3)
+    np.testing.assert_allclose(buffers.points, expected)
+
+
+def test_facesFollowPolyCube():
+    layout = tl.computeLayout(tl.LayoutParams(tileX=2, tileY=3, seed=1))
+    buffers = tm.buildMeshBuffers(layout)
+    assert len(buffers.points) == len(layout) * tm.POINTS_PER_TILE
+    np.testing.assert_array_equal(buffers.faceCounts, 4)
+    faces = buffers.faceConnects.reshape(len(layout), tm.FACES_PER_TILE, 4)
+    for tile in range(len(layout)):
+        np.testing.assert_array_equal(faces[tile], np.array(POLYCUBE_FACES) + tile * tm.POINTS_PER_TILE)
+
+
+def test_rotationOrder():
+    # Maya's default rotate order xyz: X is applied first, then Y, then Z
+    point = tm.tilePoints(np.array([[2., 2., 2.]]), np.zeros((1, 3)), np.array([[0., 90., 0.]]))[0, 1]
+    np.testing.assert_allclose(point, (1, -1, -1), atol=1e-12)
+    point = tm.tilePoints(np.array([[2., 2., 2.]]), np.zeros((1, 3)), np.array([[90., 90., 0.]]))[0, 1]
+    np.testing.assert_allclose(point, (-1, -1, -1), atol=1e-12)
+
+
+def test_tileOfFace():
+    layout = tl.computeLayout(tl.LayoutParams(tileX=3, tileY=2, seed=1))
+    buffers = tm.buildMeshBuffers(layout)
+    faces = np.arange(len(buffers.faceCounts))
+    # every vertex of a face lies within the points of its tile
+    vertices = buffers.faceConnects.reshape(-1, 4)
+    np.testing.assert_array_equal(vertices // tm.POINTS_PER_TILE, np.repeat(tm.tileOfFace(faces)[:, None], 4, axis=1))
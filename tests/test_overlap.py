@@ -0,0 +1,55 @@
+import itertools
+
+import numpy as np
+import pytest
+
+import Tile_Layout as tl
+import Tile_Overlap as to
+
+
+def denseParams(seed=1, **values):
+    return tl.LayoutParams(tileX=30, tileY=30, seed=seed, gapXmin=.05, gapXmax=.1, gapYmin=.05, gapYmax=.1,
+                           **values)
+
+
+def test_emptyLayoutHasNoPairs():
+    layout = tl.computeRows(tl.LayoutParams(tileX=0, tileY=5, seed=1), 0, 0)
+    pairs = to.candidatePairs(layout.positions, 1.0)
+    assert pairs.shape == (0, 2)
+    assert len(to.findOverlaps(layout, tl.LayoutParams(tileX=0, tileY=5, seed=1))) == 0
+    report = to.resolveOverlaps(layout, tl.LayoutParams(tileX=0, tileY=5, seed=1))
+    assert (report.found, report.fixed, report.remaining) == (0, 0, 0)
+
+
+def test_candidatePairsMatchBruteForce():
+    params = denseParams(seed=4)
+    layout = tl.computeLayout(params)
+    radius = to.maxRadius(params)
+    pairs = set(map(tuple, to.candidatePairs(layout.positions, radius).tolist()))
+    floor = layout.positions[:, [0, 2]]
+    expected = {(a, b) for a, b in itertools.combinations(range(len(layout)), 2)
+                if ((floor[a] - floor[b]) ** 2).sum() < (2 * radius) ** 2}
+    assert pairs == expected
+
+
+@pytest.mark.parametrize("values", [{}, {"rotationYMin": 5, "rotationYMax": 15}])
+def test_resolvingNeverMakesLayoutWorse(values):
+    params = denseParams(**values)
+    layout = tl.computeLayout(params)
+    original = layout.copy()
+    report = to.resolveOverlaps(layout, params)
+    assert report.found > 0
+    assert report.remaining < report.found
+    assert report.remaining == len(to.findOverlaps(layout, params))
+    np.testing.assert_array_equal(layout.sizes, original.sizes)
+    np.testing.assert_array_equal(layout.positions[:, [0, 2]], original.positions[:, [0, 2]])
+
+
+def test_resolvedValuesStayInRange():
+    params = denseParams(rotationXMin=-20, rotationXMax=20, heightVariationMin=-.5, heightVariationMax=.5)
+    layout = tl.computeLayout(params)
+    to.resolveOverlaps(layout, params)
+    for name, (array, column) in tl.TILE_ATTRIBUTES.items():
+        low, high = sorted(getattr(params, field) for field in tl.ATTRIBUTE_RANGES[name])
+        values = getattr(layout, array)[:, column]
+        assert values.min() >= low - 1e-9 and values.max() <= high + 1e-9, name
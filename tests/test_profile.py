@@ -0,0 +1,59 @@
+import Tile_Commit as tc
+import Tile_Profile as tp
+
+
+def test_disabledProfilerRecordsNothing(makeGenerator):
+    generator, cmds = makeGenerator("cubes")
+    backend = generator.backend
+    generator.buildTiles()
+    generator.clearTiles()
+    assert generator.profiler.last is None and generator.profiler.current is None
+    assert generator.profiler.run("generateTiles", backend) is tp.NULL_CONTEXT
+    assert generator.profiler.phase("layout") is tp.NULL_CONTEXT
+    assert backend.profiler is None and backend.cmds is cmds
+
+
+def test_runRecordsPhasesAndCounters(makeGenerator):
+    generator, cmds = makeGenerator("cubes", tileX=6, tileY=4)
+    generator.profiler.enabled = True
+    generator.buildTiles()
+    stats = generator.profiler.last
+    assert stats.name == "generateTiles" and stats.seconds > 0
+    assert "layout" in stats.phases and "registry" in stats.phases
+    assert stats.counters["tiles"] == 24
+    assert not stats.commands  # commands are only counted when asked for
+    assert generator.profiler.current is None and generator.backend.profiler is None
+
+
+def test_nestedRunsArePartOfTheOuterRun(makeGenerator):
+    generator, cmds = makeGenerator("cubes")
+    generator.profiler.enabled = True
+    with generator.profiler.run("session", generator.backend):
+        generator.buildTiles()
+        generator.clearTiles()
+    assert [stats.name for stats in generator.profiler.history] == ["session"]
+    assert generator.profiler.last.counters["tiles"] == 24
+
+
+def test_commandsAreCounted(makeGenerator):
+    generator, cmds = makeGenerator("cubes", tileX=6, tileY=4)
+    generator.profiler.enabled = generator.profiler.countCommands = True
+    cmds.callCounts.clear()
+    generator.buildTiles()
+    stats = generator.profiler.last
+    counted = {name: calls for name, (calls, seconds) in stats.commands.items()}
+    assert counted == dict(cmds.callCounts)
+    assert counted["polyCube"] == 24
+    assert not isinstance(generator.backend.cmds, tp.CountingCmds)  # the backend gets maya.cmds back
+
+
+def test_historyKeepsTheLastRuns():
+    profiler = tp.Profiler(enabled=True, keep=2)
+    backend = tc.RecordingBackend(tc.RecordingCmds())
+    for name in ("a", "b", "c"):
+        with profiler.run(name, backend):
+            with profiler.phase("work"):
+                profiler.count("items", 2)
+    assert [stats.name for stats in profiler.history] == ["b", "c"]
+    assert profiler.last.phases["work"][0] == 1 and profiler.last.counters["items"] == 2
+    assert str(profiler.last).startswith("c ")